@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+# Throughput of decode_many() and encode_many() with 1, 2, 4 and 8 worker processes against a plain decode() loop
+
+import os
+import random
+import time
+
+from common import random_fumen
+from py_fumen import decode, decode_many, encode_many
+
+FUMEN_COUNT = 1500
+WORKERS = [1, 2, 4, 8]
+
+def main():
+    rng = random.Random(16)
+    fumens = [random_fumen(rng, rng.randint(5, 40)) for _ in range(FUMEN_COUNT)]
+    megabytes = sum(len(fumen) for fumen in fumens) / 1e6
+    print(f'{FUMEN_COUNT} fumens, {megabytes:.2f} MB, {os.cpu_count()} CPUs')
+
+    start = time.perf_counter()
+    for fumen in fumens:
+        decode(fumen)
+    seconds = time.perf_counter() - start
+    print(f'decode() loop     {FUMEN_COUNT / seconds:7.0f} fumens/s')
+
+    for workers in WORKERS:
+        start = time.perf_counter()
+        decoded = decode_many(fumens, workers=workers)
+        decode_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        encode_many(decoded, workers=workers)
+        encode_seconds = time.perf_counter() - start
+
+        print(f'workers={workers}  decode_many {FUMEN_COUNT / decode_seconds:7.0f} fumens/s ({megabytes / decode_seconds:.2f} MB/s)'
+              f'  encode_many {FUMEN_COUNT / encode_seconds:7.0f} fumens/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+# Comment throughput of encode() and decode() on a tutorial-like fumen with a paragraph per page, and of escape()/unescape()
+
+import random
+
+from common import best_of
+from py_fumen import decode, encode, Page
+from py_fumen.page import Flags
+from py_fumen.field import create_new_inner_field
+from py_fumen.js_escape import escape, unescape
+
+WORDS = "the piece goes here, then rotate it (twice) to make a T-spin! Don't forget: 50% of the stack; use hold. é ü テトリス".split()
+PAGE_COUNT = 300
+PARAGRAPH_LENGTH = 600
+
+def paragraph(rng: random.Random) -> str:
+    words = []
+    length = 0
+    while length < PARAGRAPH_LENGTH:
+        words.append(rng.choice(WORDS))
+        length += len(words[-1]) + 1
+
+    return ' '.join(words)
+
+def main():
+    rng = random.Random(5)
+    pages = [Page(index, create_new_inner_field(), None, paragraph(rng), Flags(lock=False)) for index in range(PAGE_COUNT)]
+    fumen = encode(pages)
+    assert [page.comment for page in decode(fumen)] == [page.comment for page in pages]
+
+    text = '\n'.join(page.comment for page in pages)
+    escaped = escape(text)
+    megabytes = len(text.encode('utf-8')) / 1e6
+    print(f'{PAGE_COUNT} pages, {megabytes:.2f} MB of comments, fumen {len(fumen)} chars')
+
+    for name, function in (('encode', lambda: encode(pages)), ('decode', lambda: decode(fumen)), ('escape', lambda: escape(text)), ('unescape', lambda: unescape(escaped))):
+        seconds = best_of(function, 15)
+        print(f'{name:>8} {seconds * 1e3:7.1f} ms {megabytes / seconds:6.2f} MB/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+# Decode time per page count, the time per page stays flat when decode is linear in the fumen length
+
+import random
+
+from common import best_of, random_fumen
+from py_fumen import decode
+
+PAGE_COUNTS = [250, 500, 1000, 2000, 4000]
+
+def main():
+    rng = random.Random(1)
+    print(f'{"pages":>6} {"chars":>8} {"decode":>10} {"per page":>10}')
+    for page_count in PAGE_COUNTS:
+        fumen = random_fumen(rng, page_count)
+        seconds = best_of(lambda: decode(fumen))
+        print(f'{page_count:6d} {len(fumen):8d} {seconds * 1e3:7.1f} ms {seconds / page_count * 1e6:7.1f} us')
+
+if __name__ == '__main__':
+    main()
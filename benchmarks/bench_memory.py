@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+# Memory kept by the decoded pages of a 10k page corpus, measured with tracemalloc, and the time to decode it
+
+import gc
+import random
+import tracemalloc
+
+from common import best_of, random_fumen
+from py_fumen import decode
+
+FUMEN_COUNT = 100
+PAGE_COUNT = 100
+
+def main():
+    rng = random.Random(21)
+    fumens = [random_fumen(rng, PAGE_COUNT) for _ in range(FUMEN_COUNT)]
+    for fumen in fumens[:3]:
+        decode(fumen)
+
+    gc.collect()
+    tracemalloc.start()
+    decoded = [decode(fumen) for fumen in fumens]
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    page_count = sum(len(pages) for pages in decoded)
+    del decoded
+
+    seconds = best_of(lambda: [decode(fumen) for fumen in fumens], 3)
+    print(f'{page_count} pages: retained {retained / 1e6:.2f} MB ({retained / page_count:.0f} B/page), peak {peak / 1e6:.2f} MB, decode {seconds * 1e3:.0f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+# Placements per second of get_placements() for every piece on standard test fields
+
+import random
+import time
+
+import common
+from py_fumen import Field, create_inner_field, get_placements
+from py_fumen.inner_field import InnerField
+from py_fumen.defines import Piece
+
+PIECES = [Piece.I, Piece.O, Piece.T, Piece.S, Piece.Z, Piece.J, Piece.L]
+DURATION = 1.0
+
+def test_fields():
+    rng = random.Random(2)
+    return {
+        'empty': InnerField(),
+        'tsd': create_inner_field(Field.create('XX________' 'X___XXXXXX' 'XX_XXXXXXX', None)),
+        'messy': create_inner_field(Field.create(''.join('X' if rng.random() < 0.7 else '_' for _ in range(80)), None)),
+    }
+
+def main():
+    print(f'{"field":>6} {"180":>5} {"searches/s":>11} {"placements/s":>13}')
+    for name, field in test_fields().items():
+        for use_180 in (False, True):
+            searches = 0
+            placements = 0
+            start = time.perf_counter()
+            while time.perf_counter() - start < DURATION:
+                for piece in PIECES:
+                    placements += len(get_placements(field, piece, use_180=use_180))
+                    searches += 1
+
+            seconds = time.perf_counter() - start
+            print(f'{name:>6} {use_180!s:>5} {searches / seconds:11.0f} {placements / seconds:13.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+# Scanner throughput in MB/s on a generated chat log with plain, URL-embedded and percent-encoded fumens,
+# against splitting the lines and calling extract() on every candidate
+
+import os
+import random
+import tempfile
+import time
+
+from common import random_fumen
+from py_fumen import extract, scan_chunks, scan_file, scan_stream, scan_text
+
+LOG_SIZE = 20 * 1024 * 1024
+WORDS = 'hello this is a chat log line with some words about tetris pc opener tspin v115 at @ & ? 100% 110 m11'.split()
+PREFIXES = ('v115@', 'm115@', 'd115@', 'v110@', 'm110@', 'd110@')
+
+def embedded(rng: random.Random, fumen: str) -> str:
+    style = rng.randrange(4)
+    if style == 0:
+        return fumen
+    if style == 1:
+        return 'https://harddrop.com/fumen/?' + fumen + '&foo=1'
+    if style == 2:
+        return 'https://knewjade.github.io/fumen-for-mobile/#?d=' + fumen.replace('v115', 'd115', 1).replace('+', '%2B').replace('/', '%2F')
+
+    return '<' + fumen.replace('v115', 'm115', 1) + '>'
+
+def chat_log(rng: random.Random):
+    fumens = [random_fumen(rng, rng.randint(1, 30)) for _ in range(50)]
+    lines = []
+    size = 0
+    while size < LOG_SIZE:
+        text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 20)))
+        if rng.random() < 0.05:
+            text = text + ' ' + embedded(rng, rng.choice(fumens)) + ' ' + text
+
+        lines.append(text + '\n')
+        size += len(text) + 1
+
+    return lines
+
+def split_and_extract(lines):
+    found = []
+    for line in lines:
+        for token in line.split():
+            if any(prefix in token for prefix in PREFIXES):
+                try:
+                    found.append(extract(token))
+
+                except Exception:
+                    pass
+
+    return found
+
+def main():
+    lines = chat_log(random.Random(23))
+    text = ''.join(lines)
+    megabytes = len(text.encode('utf-8')) / 1e6
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'chat.log')
+        with open(path, 'w') as file:
+            file.write(text)
+
+        def read_stream():
+            with open(path) as file:
+                return list(scan_stream(file))
+
+        runs = [
+            ('scan_text', lambda: list(scan_text(text))),
+            ('scan_file', lambda: list(scan_file(path))),
+            ('scan_chunks', lambda: list(scan_chunks(lines))),
+            ('scan_stream', read_stream),
+            ('split+extract', lambda: split_and_extract(lines)),
+        ]
+
+        print(f'log {megabytes:.1f} MB')
+        for name, function in runs:
+            start = time.perf_counter()
+            found = function()
+            seconds = time.perf_counter() - start
+            print(f'{name:>13} {megabytes / seconds:7.1f} MB/s {len(found):6d} fumens')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+from pathlib import Path
+
+# The package is not installed, benchmarks run it from src and build their input with the test fumen generator
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src'))
+sys.path.insert(0, str(ROOT / 'tests'))
+
+from random_fumens import random_fumen, random_pages
+
+# Shortest time of function() in seconds
+def best_of(function, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    return best
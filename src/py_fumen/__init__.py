@@ -7,4 +7,13 @@ from .field import *
 from .quiz import *
 from .action import *
 from .defines import *
-from .inner_field import *
\ No newline at end of file
+from .inner_field import *
+from .numpy_decoder import *
+from .placement import *
+from .page_index import *
+from .bulk import *
+from .decode_cache import *
+from .page_corpus import *
+from .scanner import *
+from .minify import *
+from .splice import *
\ No newline at end of file
@@ -6,9 +6,11 @@ from typing import Tuple
 
 from .defines import is_mino_piece, InnerOperation, Piece, Rotation
 from .constants import FieldConstants
+from .geometry import CORRECTIONS
 
-@dataclass
+@dataclass(frozen=True)
 class Action():
+    __slots__ = ('piece', 'rise', 'mirror', 'colorize', 'comment', 'lock')
     piece: InnerOperation
     rise: bool
     mirror: bool
@@ -16,6 +18,10 @@ class Action():
     comment: bool
     lock: bool
 
+    # Frozen slots can not be restored by setattr, pickle and copy call the constructor instead
+    def __reduce__(self):
+        return (Action, (self.piece, self.rise, self.mirror, self.colorize, self.comment, self.lock))
+
 def decode_bool(n: int):
     return n != 0
 
@@ -54,25 +60,10 @@ class ActionDecoder() :
         ORIGIN_Y = floor(n / 10)
         y = self.field_top - ORIGIN_Y - 1
 
-        if piece is Piece.O and rotation is Rotation.LEFT:
-            x += 1
-            y -= 1
-        elif piece is Piece.O and rotation is Rotation.REVERSE:
-            x += 1
-        elif piece is Piece.O and rotation is Rotation.SPAWN:
-            y -= 1
-        elif piece is Piece.I and rotation is Rotation.REVERSE:
-            x += 1
-        elif piece is Piece.I and rotation is Rotation.LEFT:
-            y -= 1
-        elif piece is Piece.S and rotation is Rotation.SPAWN:
-            y -= 1
-        elif piece is Piece.S and rotation is Rotation.RIGHT:
-            x -= 1
-        elif piece is Piece.Z and rotation is Rotation.SPAWN:
-            y -= 1
-        elif piece is Piece.Z and rotation is Rotation.LEFT:
-            x += 1
+        if is_mino_piece(piece):
+            dx, dy = CORRECTIONS[piece][rotation]
+            x += dx
+            y += dy
 
         return (x, y)
 
@@ -129,25 +120,10 @@ class ActionEncoder():
         if not is_mino_piece(piece_type):
             x = 0
             y = 22
-        elif piece_type is Piece.O and rotation is Rotation.LEFT:
-            x -= 1
-            y += 1
-        elif piece_type is Piece.O and rotation is Rotation.REVERSE:
-            x -= 1
-        elif piece_type is Piece.O and rotation is Rotation.SPAWN:
-            y += 1
-        elif piece_type is Piece.I and rotation is Rotation.REVERSE:
-            x -= 1
-        elif piece_type is Piece.I and rotation is Rotation.LEFT:
-            y += 1
-        elif piece_type is Piece.S and rotation is Rotation.SPAWN:
-            y += 1
-        elif piece_type is Piece.S and rotation is Rotation.RIGHT:
-            x += 1
-        elif piece_type is Piece.Z and rotation is Rotation.SPAWN:
-            y += 1
-        elif piece_type is Piece.Z and rotation is Rotation.LEFT:
-            x -= 1
+        else:
+            dx, dy = CORRECTIONS[piece_type][rotation]
+            x -= dx
+            y -= dy
 
         return (self.field_top - y - 1) * self.width + x
 
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from multiprocessing import Pool
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .page import Page, Flags, Refs
+from .inner_field import InnerField
+from .defines import parse_piece, parse_piece_name, parse_rotation, parse_rotation_name, Piece, Rotation
+from .decoder import extract, get_field_top, iter_raw_pages
+from .encoder import encode
+from .field import Mino
+
+__all__ = ['PackedPage', 'PackedPages', 'pack_fumen', 'encode_packed', 'decode_many', 'encode_many']
+
+# Pages are sent between processes as plain tuples instead of pickled Page objects:
+# (field bytes or None when equal to the previous page, (piece, rotation, x, y) or None, comment, flags, field ref, comment ref)
+PackedOperation = Optional[Tuple[int, int, int, int]]
+PackedPage = Tuple[Optional[bytes], PackedOperation, Optional[str], int, Optional[int], Optional[int]]
+
+def pack_flags(lock: Optional[bool], mirror: Optional[bool], colorize: Optional[bool], rise: Optional[bool], quiz: Optional[bool]) -> int:
+    return Flags(lock, mirror, colorize, rise, quiz).bits
+
+def unpack_flags(flags: int) -> Flags:
+    return Flags.from_bits(flags)
+
+def pack_fumen(fumen: str) -> List[PackedPage]:
+    version, data = extract(fumen)
+
+    packed: List[PackedPage] = []
+    prev_cells: Optional[bytes] = None
+    for page_index, field, piece, action, quiz, comment, field_ref, comment_ref in iter_raw_pages(data, get_field_top(version)):
+        cells = field.to_bytes()
+        packed.append((cells if cells != prev_cells else None,
+                       (piece.piece_type.value, piece.rotation.value, piece.x, piece.y) if piece is not None else None,
+                       comment,
+                       pack_flags(action.lock, action.mirror, action.colorize, action.rise, quiz),
+                       field_ref,
+                       comment_ref))
+        prev_cells = cells
+
+    return packed
+
+def pack_page(page: Page) -> PackedPage:
+    operation = page.operation
+    flags = page.flags if page.flags is not None else Flags()
+    refs = page.refs if page.refs is not None else Refs()
+    return (page._borrow_inner_field().to_bytes(),
+            (parse_piece(operation.piece_type).value, parse_rotation(operation.rotation).value, operation.x, operation.y) if operation is not None else None,
+            page.comment,
+            flags.bits,
+            refs.field,
+            refs.comment)
+
+def unpack_page(index: int, cells: bytes, packed_page: PackedPage) -> Page:
+    _, operation, comment, flags, field_ref, comment_ref = packed_page
+    mino = Mino(parse_piece_name(Piece(operation[0])), parse_rotation_name(Rotation(operation[1])), operation[2], operation[3]) if operation is not None else None
+    # from_bytes() slices the view, so the cells are copied once into the field instead of into a slice first
+    return Page(index, InnerField.from_bytes(memoryview(cells)), mino, comment, unpack_flags(flags), Refs(field_ref, comment_ref))
+
+# Decoded pages of one fumen, a Page is only built when it is accessed
+class PackedPages():
+    packed: List[PackedPage]
+    __sources: List[int]
+
+    def __init__(self, packed: List[PackedPage]):
+        self.packed = packed
+
+        # Index of the page holding the field bytes of each page
+        self.__sources = []
+        source = 0
+        for index, packed_page in enumerate(packed):
+            if packed_page[0] is not None:
+                source = index
+            self.__sources.append(source)
+
+    def __len__(self) -> int:
+        return len(self.packed)
+
+    def __getitem__(self, index: int) -> Page:
+        if index < 0:
+            index += len(self.packed)
+
+        return unpack_page(index, self.packed[self.__sources[index]][0], self.packed[index])
+
+    def __iter__(self) -> Iterator[Page]:
+        return (self[index] for index in range(len(self.packed)))
+
+    def get_field_bytes(self, index: int) -> bytes:
+        return self.packed[self.__sources[index]][0]
+
+    def to_pages(self) -> List[Page]:
+        return list(self)
+
+def encode_packed(packed: Sequence[PackedPage]) -> str:
+    return encode(PackedPages(list(packed)).to_pages())
+
+def map_chunks(function, items: List, workers: int, chunksize: Optional[int]) -> List:
+    if workers <= 1:
+        return [function(item) for item in items]
+
+    if chunksize is None:
+        chunksize = max(1, len(items) // (workers * 4))
+
+    with Pool(workers) as pool:
+        return pool.map(function, items, chunksize)
+
+# Decode many fumens in worker processes, the pages come back packed and are turned into Page lazily
+def decode_many(fumens: Iterable[str], workers: int = 1, chunksize: Optional[int] = None) -> List[PackedPages]:
+    return [PackedPages(packed) for packed in map_chunks(pack_fumen, list(fumens), workers, chunksize)]
+
+# Encode many page lists in worker processes, pages are packed in this process before they are sent
+def encode_many(page_lists: Iterable[Sequence[Page] | PackedPages], workers: int = 1, chunksize: Optional[int] = None) -> List[str]:
+    packed = [pages.packed if isinstance(pages, PackedPages) else [pack_page(page) for page in pages] for pages in page_lists]
+    return map_chunks(encode_packed, packed, workers, chunksize)
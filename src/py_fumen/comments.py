@@ -1,20 +1,56 @@
 # -*- coding: utf-8 -*-
 
-from math import floor
+from typing import List
 
 COMMENT_TABLE = ' !"#$%&\'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~'
 MAX_COMMENT_CHAR_VALUE = len(COMMENT_TABLE) + 1
 
+# Character -> index in COMMENT_TABLE
+COMMENT_VALUES = { ch: index for index, ch in enumerate(COMMENT_TABLE) }
+CHAR_WEIGHTS = [MAX_COMMENT_CHAR_VALUE ** count for count in range(4)]
+
+# A comment value holds 4 characters, it is decoded as two halves of 2 characters
+# Halves with the index MAX_COMMENT_CHAR_VALUE - 1, which has no character, are None
+PAIR_VALUE = MAX_COMMENT_CHAR_VALUE ** 2
+PAIR_TABLE = [COMMENT_TABLE[value % MAX_COMMENT_CHAR_VALUE] + COMMENT_TABLE[value // MAX_COMMENT_CHAR_VALUE]
+              if value % MAX_COMMENT_CHAR_VALUE < len(COMMENT_TABLE) and value // MAX_COMMENT_CHAR_VALUE < len(COMMENT_TABLE) else None
+              for value in range(PAIR_VALUE)]
+
 class CommentParser():
-    def decode(v: int) -> str:
-        string = ''
-        value = v
-        for count in range (4):
-            index = value % MAX_COMMENT_CHAR_VALUE
-            string += COMMENT_TABLE[index]
-            value = floor(value / MAX_COMMENT_CHAR_VALUE)
+    class CommentException(Exception):
+        pass
 
-        return string
+    def decode(v: int) -> str:
+        return CommentParser.decode_values([v])
 
     def encode(ch: str, count: int) -> int:
-        return COMMENT_TABLE.index(ch) * (MAX_COMMENT_CHAR_VALUE ** count)
\ No newline at end of file
+        if ch not in COMMENT_VALUES:
+            raise CommentParser.CommentException(f'Unexpected character: {ch}')
+
+        return COMMENT_VALUES[ch] * CHAR_WEIGHTS[count]
+
+    # Decode comment values into 4 characters each
+    def decode_values(values: List[int]) -> str:
+        pairs = [None] * (len(values) * 2)
+        pairs[0::2] = [PAIR_TABLE[value % PAIR_VALUE] for value in values]
+        pairs[1::2] = [PAIR_TABLE[value // PAIR_VALUE % PAIR_VALUE] for value in values]
+
+        try:
+            return ''.join(pairs)
+
+        except TypeError:
+            raise CommentParser.CommentException('Unexpected comment value')
+
+    # Encode a comment into values of 4 characters each, the last one is padded with ' ' (index 0)
+    def encode_text(text: str) -> List[int]:
+        try:
+            indexes = [COMMENT_VALUES[ch] for ch in text]
+
+        except KeyError as e:
+            raise CommentParser.CommentException(f'Unexpected character: {e.args[0]}')
+
+        indexes += [0] * (-len(indexes) % 4)
+        _, second, third, fourth = CHAR_WEIGHTS
+
+        return [a + b * second + c * third + d * fourth
+                for a, b, c, d in zip(indexes[0::4], indexes[1::4], indexes[2::4], indexes[3::4])]
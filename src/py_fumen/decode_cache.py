@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .page import Page, Refs
+from .inner_field import InnerField
+from .defines import parse_piece_name, parse_rotation_name, Piece, Rotation
+from .field import Mino
+from .bulk import pack_fumen, unpack_flags, PackedPage
+
+__all__ = ['CacheStats', 'DecodeCache']
+
+# Approximate memory of the parts of an entry, measured with tracemalloc
+FIELD_SIZE = 1800
+PAGE_SIZE = 200
+
+# Decoded fumen kept by DecodeCache, it is never modified after it is created
+# Pages with the same field as the previous page share its InnerField
+@dataclass(frozen=True)
+class CacheEntry():
+    packed: Tuple[PackedPage, ...]
+    fields: Tuple[InnerField, ...]
+    size: int
+
+    @staticmethod
+    def create(fumen: str) -> CacheEntry:
+        packed = pack_fumen(fumen)
+
+        fields: List[InnerField] = []
+        size = len(fumen)
+        for cells, _, comment, _, _, _ in packed:
+            if cells is not None:
+                fields.append(InnerField.from_bytes(cells))
+                size += FIELD_SIZE
+            else:
+                fields.append(fields[-1])
+
+            size += PAGE_SIZE + (len(comment) if comment is not None else 0)
+
+        return CacheEntry(tuple(packed), tuple(fields), size)
+
+    # New Page objects over the shared fields, Page.get_field() copies a field only when it is modified
+    def to_pages(self) -> List[Page]:
+        pages: List[Page] = []
+        for index, (field, (_, operation, comment, flags, field_ref, comment_ref)) in enumerate(zip(self.fields, self.packed)):
+            mino = Mino(parse_piece_name(Piece(operation[0])), parse_rotation_name(Rotation(operation[1])), operation[2], operation[3]) if operation is not None else None
+            pages.append(Page(index, field, mino, comment, unpack_flags(flags), Refs(field_ref, comment_ref), copy_field=False))
+
+        return pages
+
+@dataclass
+class CacheStats():
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+
+# Opt-in memoization of decode(), least recently used fumens are evicted past max_entries or max_size (approximate bytes)
+class DecodeCache():
+    max_entries: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+    __entries: OrderedDict[str, CacheEntry]
+    __size: int
+
+    def __init__(self, max_entries: int = 1024, max_size: int = 64 * 1024 * 1024):
+        if max_entries < 0 or max_size < 0:
+            raise ValueError('Cache limits must not be negative')
+
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.__entries = OrderedDict()
+        self.__size = 0
+
+    def decode(self, fumen: str) -> List[Page]:
+        entry = self.__entries.get(fumen)
+        if entry is not None:
+            self.hits += 1
+            self.__entries.move_to_end(fumen)
+            return entry.to_pages()
+
+        self.misses += 1
+        entry = CacheEntry.create(fumen)
+
+        # Entries larger than the whole cache are not kept
+        if 0 < self.max_entries and entry.size <= self.max_size:
+            self.__entries[fumen] = entry
+            self.__size += entry.size
+            self.__evict()
+
+        return entry.to_pages()
+
+    def __evict(self):
+        while self.max_entries < len(self.__entries) or self.max_size < self.__size:
+            _, entry = self.__entries.popitem(last=False)
+            self.__size -= entry.size
+            self.evictions += 1
+
+    # Drop one fumen, or every fumen when none is given
+    def invalidate(self, fumen: Optional[str] = None) -> bool:
+        if fumen is None:
+            removed = 0 < len(self.__entries)
+            self.__entries.clear()
+            self.__size = 0
+            return removed
+
+        entry = self.__entries.pop(fumen, None)
+        if entry is None:
+            return False
+
+        self.__size -= entry.size
+        return True
+
+    def __contains__(self, fumen: str) -> bool:
+        return fumen in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def size(self) -> int:
+        return self.__size
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self.__entries), self.__size)
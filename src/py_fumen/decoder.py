@@ -1,17 +1,18 @@
 # -*- coding: utf-8 -*-
 
+from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Callable, Iterator, List, Optional, Tuple
 from math import floor
 
 from .page import Page, Flags, Refs
 from .inner_field import InnerField
 from .fumen_buffer import FumenBuffer
-from .defines import is_mino_piece, parse_piece_name, parse_rotation_name, Piece
-from .action import ActionDecoder
+from .defines import is_mino_piece, parse_piece_name, parse_rotation_name, InnerOperation, Piece
+from .action import Action, ActionDecoder
 from .comments import CommentParser
 from .quiz import Quiz
-from .field import create_new_inner_field, Mino, Operation
+from .field import create_new_inner_field, Mino
 from .constants import FieldConstants
 from .js_escape import unescape
 
@@ -39,12 +40,38 @@ def extract(string: str) -> Tuple[str, str]:
 
     raise VersionException("Unsupported fumen version")
 
+def get_field_top(version: str) -> int:
+    if version == "115":
+        return 23
+    if version == "110":
+        return 21
+
+    raise VersionException("Unsupported fumen version")
+
 def decode(fumen: str) -> List[Page]:
+    return list(iter_decode(fumen))
+
+# Yield pages one by one, only the previous field and the comment/quiz state are kept
+def iter_decode(fumen: str) -> Iterator[Page]:
+    version, data = extract(fumen)
+    if version == "115":
+        return iter_inner_decode(data, 23)
+    if version == "110":
+        return iter_inner_decode(data, 21)
+
+    raise VersionException("Unsupported fumen version")
+
+# on_page(index, field, operation, action, quiz, comment)
+# field is the live InnerField before the page's piece is locked, it is mutated after the callback returns
+PageCallback = Callable[[int, InnerField, Optional[InnerOperation], Action, bool, str], None]
+
+# Decode without building Page objects or copying the field per page
+def decode_with(fumen: str, on_page: PageCallback) -> None:
     version, data = extract(fumen)
     if version == "115":
-        return inner_decode(data, 23)
+        return inner_decode_with(data, 23, on_page)
     if version == "110":
-        return inner_decode(data, 21)
+        return inner_decode_with(data, 21, on_page)
 
     raise VersionException("Unsupported fumen version")
 
@@ -74,23 +101,157 @@ class Comment():
 class PageField():
     ref: Optional[int] = None
 
+# Decoder state at the start of a page, enough to resume decoding from there
+@dataclass
+class Checkpoint():
+    page_index: int
+    offset: int
+    field: bytes
+    repeat_count: int
+    comment_ref: int
+    field_ref: int
+    last_comment_text: str
+    quiz: Optional[str] = None
+
+    @staticmethod
+    def create(page_index: int, offset: int, prev_field: InnerField, store: Store) -> Checkpoint:
+        return Checkpoint(page_index, offset, prev_field.to_bytes(), store.repeat_count,
+                          store.ref_index.comment, store.ref_index.field, store.last_comment_text,
+                          store.quiz.to_string() if store.quiz is not None else None)
+
+    def to_store(self) -> Store:
+        return Store(self.repeat_count, RefIndex(self.comment_ref, self.field_ref), self.last_comment_text,
+                     Quiz(self.quiz) if self.quiz is not None else None)
+
+# on_page_start(page index, buffer offset, previous field, store), called before each page is parsed
+PageStartCallback = Callable[[int, int, InnerField, Store], None]
+
 def inner_decode(data: str, field_top: int) -> List[Page]:
+    return list(iter_inner_decode(data, field_top))
+
+# Whether locking the action leaves the field as it is: no lock, or a lock without a piece, rise or mirror on a field
+# without a full line to clear
+def keeps_field(field: InnerField, action: Action) -> bool:
+    if not action.lock:
+        return True
+
+    return not (is_mino_piece(action.piece.piece_type) or action.rise or action.mirror or field.has_full_line())
+
+# A page whose field is unchanged shares the field of the previous page when the lock step of that page kept its field
+# Pages never modify their field in place, Page.get_field() copies it on the first change
+def iter_inner_decode(data: str, field_top: int, checkpoint: Optional[Checkpoint] = None) -> Iterator[Page]:
+    prev_page: Optional[Page] = None
+    prev_kept = False
+    for raw_page in iter_raw_pages(data, field_top, checkpoint):
+        _, field, _, action, _, _, field_ref, _ = raw_page
+        shared_field = prev_page._borrow_inner_field() if prev_page is not None and field_ref is not None and prev_kept else None
+
+        page = to_page(raw_page, shared_field)
+        prev_kept = keeps_field(field, action)
+        yield page
+
+        prev_page = page
+
+# Page without its field, produced by skim()
+@dataclass
+class SkimPage():
+    index: int
+    operation: Optional[InnerOperation]
+    comment: str
+    flags: Flags
+    refs: Refs
+
+def skim(fumen: str) -> List[SkimPage]:
+    return list(iter_skim(fumen))
+
+# Decode operations, comments, quiz state and flags only, field run-lengths are skipped without simulating the field
+def iter_skim(fumen: str) -> Iterator[SkimPage]:
+    version, data = extract(fumen)
+    for page_index, _, current_piece, action, quiz, comment, field_ref, comment_ref in iter_raw_pages(data, get_field_top(version), simulate_field=False):
+        yield SkimPage(page_index,
+                       current_piece,
+                       comment,
+                       Flags(action.lock, action.mirror, action.colorize, action.rise, quiz),
+                       Refs(field=field_ref, comment=comment_ref))
+
+def inner_decode_with(data: str, field_top: int, on_page: PageCallback) -> None:
+    for page_index, field, current_piece, action, quiz, comment, field_ref, comment_ref in iter_raw_pages(data, field_top):
+        on_page(page_index, field, current_piece, action, quiz, comment)
+
+# Quiz state set by a comment, None when the comment is not a quiz
+def parse_quiz_comment(text: str) -> Optional[Quiz]:
+    if Quiz.is_quiz_comment(text):
+        try:
+            return Quiz(text)
+        except:
+            return None
+
+    return None
+
+# Quiz state for the next page after the action of the current page
+def step_quiz(quiz: Quiz, action: Action) -> Quiz:
+    if quiz.can_operate() and action.lock:
+        if is_mino_piece(action.piece.piece_type):
+            try:
+                next_quiz = quiz.next_if_end()
+                operation = next_quiz.get_operation(action.piece.piece_type)
+                return next_quiz.operate(operation)
+
+            except Exception as e:
+                # print(e)
+
+                # Not operate
+                return quiz.format()
+
+        return quiz.format()
+
+    return quiz
+
+RawPage = Tuple[int, InnerField, Optional[InnerOperation], Action, bool, str, Optional[int], Optional[int]]
+
+def to_page(raw_page: RawPage, shared_field: Optional[InnerField] = None) -> Page:
+    page_index, field, current_piece, action, quiz, comment, field_ref, comment_ref = raw_page
+    return Page(
+                page_index,
+                field if shared_field is None else shared_field,
+                Mino(parse_piece_name(current_piece.piece_type),
+                     parse_rotation_name(current_piece.rotation),
+                     current_piece.x,
+                     current_piece.y)
+                     if current_piece is not None else None,
+                comment,
+                Flags(action.lock, action.mirror, action.colorize, action.rise, quiz),
+                Refs(field=field_ref, comment=comment_ref),
+                copy_field=shared_field is None
+                )
+
+# Core decode loop, yields (index, live field, operation, action, quiz, comment, field ref, comment ref) per page
+# Decoding starts from the checkpoint when it is given
+# Without simulate_field the field is never built, the yielded field is None
+def iter_raw_pages(data: str, field_top: int, checkpoint: Optional[Checkpoint] = None, on_page_start: Optional[PageStartCallback] = None, simulate_field: bool = True) -> Iterator[RawPage]:
     field_max_height = field_top + FieldConstants.GARBAGE_LINE
     num_field_blocks = field_max_height * FieldConstants.WIDTH
 
     fumen_buffer = FumenBuffer(data)
 
-    page_index = 0
-    prev_field = create_new_inner_field()
+    if checkpoint is None:
+        page_index = 0
+        prev_field = create_new_inner_field() if simulate_field else None
+        store = Store(-1, RefIndex(0, 0), '', None)
+    else:
+        fumen_buffer.set_cursor(checkpoint.offset)
+        page_index = checkpoint.page_index
+        prev_field = InnerField.from_bytes(checkpoint.field) if simulate_field else None
+        store = checkpoint.to_store()
 
-    store = Store(-1, RefIndex(0, 0), '', None)
-
-    pages: List[Page] = []
     action_decoder = ActionDecoder(FieldConstants.WIDTH, field_top, FieldConstants.GARBAGE_LINE)
 
     while not fumen_buffer.is_empty():
+        if on_page_start is not None:
+            on_page_start(page_index, fumen_buffer.cursor(), prev_field, store)
+
         # Parse field
-        current_field_obj = FieldObj(False, create_new_inner_field())
+        current_field_obj: FieldObj
 
         if 0 < store.repeat_count:
             current_field_obj = FieldObj(False, prev_field)
@@ -98,7 +259,8 @@ def inner_decode(data: str, field_top: int) -> List[Page]:
             store.repeat_count -= 1
 
         else:
-            result = FieldObj(True, prev_field.copy())
+            # The diff is applied to the live field, to_page() copies it when a Page keeps it
+            result = FieldObj(True, prev_field)
             index = 0
             while index < num_field_blocks:
                 diff_block = fumen_buffer.poll(2)
@@ -109,6 +271,11 @@ def inner_decode(data: str, field_top: int) -> List[Page]:
                 if diff == 8 and num_of_blocks == num_field_blocks - 1:
                     result.changed = False
 
+                # Blocks with diff 8 are unchanged, and in skim mode the run-lengths only advance the buffer
+                if diff == 8 or not simulate_field:
+                    index += num_of_blocks + 1
+                    continue
+
                 for block in range(0, num_of_blocks + 1):
                     x = index % FieldConstants.WIDTH
                     y = field_top - floor(index / FieldConstants.WIDTH) - 1
@@ -130,17 +297,9 @@ def inner_decode(data: str, field_top: int) -> List[Page]:
         if action.comment:
 
             # when there is an update in the comment
-            comment_values: List[int] = []
             comment_length = fumen_buffer.poll(2)
-
-            for comment_counter in range(0, floor((comment_length + 3) / 4)):
-                comment_value = fumen_buffer.poll(5)
-
-                comment_values.append(comment_value)
-
-            flatten: str = ''
-            for value in comment_values:
-                flatten += CommentParser.decode(value)
+            comment_values = fumen_buffer.poll_values((comment_length + 3) // 4, 5)
+            flatten = CommentParser.decode_values(comment_values)
 
             #this is the problem. javascript escape vs python quote
             comment_text = unescape(flatten[0:comment_length])
@@ -148,16 +307,8 @@ def inner_decode(data: str, field_top: int) -> List[Page]:
             comment = Comment(text=comment_text)
             store.ref_index.comment = page_index
 
-            text = comment.text
-            if Quiz.is_quiz_comment(text):
-                try:
-                    store.quiz = Quiz(text)
-                except:
-                    store.quiz = None
-                
-            else:
-                store.quiz = None
-            
+            store.quiz = parse_quiz_comment(comment.text)
+
         elif page_index == 0:
             # When there is no update in the comment but on the first page
             comment = Comment(text='')
@@ -169,25 +320,10 @@ def inner_decode(data: str, field_top: int) -> List[Page]:
         quiz = False
         if store.quiz is not None:
             quiz = True
-
-            if store.quiz.can_operate() and action.lock:
-                if is_mino_piece(action.piece.piece_type):
-                    try:
-                        next_quiz = store.quiz.next_if_end()
-                        operation = next_quiz.get_operation(action.piece.piece_type)
-                        store.quiz = next_quiz.operate(operation)
-
-                    except Exception as e:
-                        # print(e)
-
-                        # Not operate
-                        store.quiz = store.quiz.format()
-
-                else:
-                    store.quiz = store.quiz.format()
+            store.quiz = step_quiz(store.quiz, action)
 
         # process for data processing
-        current_piece: Optional[Operation] = None
+        current_piece: Optional[InnerOperation] = None
 
         if action.piece.piece_type is not Piece.EMPTY:
             current_piece = action.piece
@@ -203,29 +339,18 @@ def inner_decode(data: str, field_top: int) -> List[Page]:
             # when there is no change in the field
             field = PageField(ref=store.ref_index.field)
 
-        pages.append(Page(
-                          page_index,
-                          current_field_obj.field,
-                          Mino.mino_from(Operation(parse_piece_name(current_piece.piece_type),
-                                                   parse_rotation_name(current_piece.rotation),
-                                                   current_piece.x,
-                                                   current_piece.y))
-                                         if current_piece is not None else None,
-                          comment.text if comment.text is not None else store.last_comment_text,
-                          Flags(action.lock, action.mirror, action.colorize, action.rise, quiz),
-                          Refs(field=field.ref, comment=comment.ref)
-                          ))
-
-        """ callback(
-            currentFieldObj.field.copy()
-            , currentPiece
-            , store.quiz !== undefined ? store.quiz.format().toString() : store.lastCommentText,
-            )
-        """
+        yield (page_index,
+               current_field_obj.field,
+               current_piece,
+               action,
+               quiz,
+               comment.text if comment.text is not None else store.last_comment_text,
+               field.ref,
+               comment.ref)
 
         page_index += 1
 
-        if action.lock:
+        if action.lock and simulate_field:
             if is_mino_piece(action.piece.piece_type):
                 current_field_obj.field.fill(action.piece)
 
@@ -238,5 +363,3 @@ def inner_decode(data: str, field_top: int) -> List[Page]:
                 current_field_obj.field.mirror()
 
         prev_field = current_field_obj.field
-
-    return pages
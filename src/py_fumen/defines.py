@@ -90,9 +90,13 @@ def parse_rotation(rotation: str) -> Rotation:
 
     raise RotationException(f'Unknown rotation: {rotation}')
 
-@dataclass
+@dataclass(frozen=True)
 class InnerOperation():
+    __slots__ = ('piece_type', 'rotation', 'x', 'y')
     piece_type: Piece
     rotation: Rotation
     x: int
     y: int
+
+    def __reduce__(self):
+        return (InnerOperation, (self.piece_type, self.rotation, self.x, self.y))
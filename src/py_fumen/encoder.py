@@ -2,7 +2,6 @@
 
 from typing import List, Optional, Tuple
 from urllib.parse import quote
-from re import findall
 
 from .page import Page, Flags
 from .inner_field import InnerField
@@ -15,86 +14,137 @@ from .quiz import Quiz
 from .constants import FieldConstants, VERSION_INFO
 from .js_escape import escape
 
-# Calculate difference from previous field: 0 to 16
-def get_diff(prev: InnerField, current: InnerField, x_index: int, y_index: int) -> int:
-    y: int = FieldConstants.HEIGHT - y_index - 1
-    return current.get_number_at(x_index, y).value - prev.get_number_at(x_index, y).value + 8
-
 # data recording
 def record_block_counts(fumen_buffer: FumenBuffer, diff: int, counter: int):
     value: int = diff * FieldConstants.MAX_BLOCKS + counter
     fumen_buffer.push(value, 2)
 
+# Cells in fumen order: from the top line down to the garbage line
+# InnerField.to_bytes() holds the garbage line first and then the field from the bottom
+def to_fumen_order(cells: bytes) -> bytes:
+    return b''.join(cells[start:start + FieldConstants.WIDTH] for start in range(FieldConstants.MAX_BLOCKS - FieldConstants.WIDTH, -1, -FieldConstants.WIDTH))
+
 # encode the field
 # Specify an empty field if there is no previous field
 # The input field has a height of 23 and a width of 10
 def encode_field(prev: InnerField, current: InnerField) -> Tuple[bool, FumenBuffer]:
+    return encode_cells(prev.to_bytes(), current.to_bytes())
+
+# Same as encode_field() for the cells of InnerField.to_bytes()
+def encode_cells(prev_cells: bytes, current_cells: bytes) -> Tuple[bool, FumenBuffer]:
     fumen_buffer = FumenBuffer()
 
+    # Unchanged field is a single run of diff 8
+    if prev_cells == current_cells:
+        record_block_counts(fumen_buffer, 8, FieldConstants.MAX_BLOCKS - 1)
+        return (False, fumen_buffer)
+
     # Convert from field value to number of consecutive blocks
-    changed = True
-    prev_diff = get_diff(prev, current, 0, 0)
+    diffs = [current - prev + 8 for current, prev in zip(to_fumen_order(current_cells), to_fumen_order(prev_cells))]
+
+    prev_diff = diffs[0]
     counter = -1
-    for y_index in range(FieldConstants.MAX_HEIGHT):
-        for x_index in range(FieldConstants.WIDTH):
-            diff = get_diff(prev, current, x_index, y_index)
-            if diff != prev_diff:
-                record_block_counts(fumen_buffer, prev_diff, counter)
-                counter = 0
-                prev_diff = diff
-            else:
-                counter += 1
+    for diff in diffs:
+        if diff != prev_diff:
+            record_block_counts(fumen_buffer, prev_diff, counter)
+            counter = 0
+            prev_diff = diff
+        else:
+            counter += 1
 
     # process last contiguous block
     record_block_counts(fumen_buffer, prev_diff, counter)
-    if prev_diff == 8 and counter == FieldConstants.MAX_BLOCKS - 1:
-        changed = False
 
-    return (changed, fumen_buffer)
+    return (True, fumen_buffer)
 
-def ensure_bool(obj: Optional[bool]) -> bool:
-    return False if obj is None else obj
+# Field of the next page after the action, the given field is not modified
+def lock_field(field: InnerField, action: Action) -> InnerField:
+    if not action.lock:
+        return field
 
-def encode(pages: List[Page]) -> str:
-    last_repeat_index = -1
-    fumen_buffer = FumenBuffer()
-    prev_field = create_new_inner_field()
+    field = field.copy()
 
-    action_encoder = ActionEncoder(FieldConstants.WIDTH, FieldConstants.HEIGHT, FieldConstants.GARBAGE_LINE)
+    if is_mino_piece(action.piece.piece_type):
+        field.fill(action.piece)
 
-    prev_comment: Optional[str] = ''
-    prev_quiz: Optional[Quiz] = None    
+    field.clear_line()
 
-    for index in range(0, len(pages)):
-        current_page = pages[index]
-        current_page.flags = current_page.flags if current_page.flags is not None else Flags()
+    if action.rise:
+        field.rise_garbage()
 
-        if isinstance(current_page, Page):
-            field: Field = current_page.get_field()
-            
-        else:
-            field: Field = current_page.field
+    if action.mirror:
+        field.mirror()
 
-        current_field: InnerField = create_inner_field(field) if field is not None else prev_field.copy()
+    return field
 
-        # Field update
-        changed, values = encode_field(prev_field, current_field)
+def ensure_bool(obj: Optional[bool]) -> bool:
+    return False if obj is None else obj
 
-        if changed:
-            # Record field and end repeat
-            fumen_buffer.merge(values)
-            last_repeat_index = -1
+def encode(pages: List[Page]) -> str:
+    fumen_encoder = FumenEncoder()
+    for page in pages:
+        fumen_encoder.append_page(page)
+
+    return fumen_encoder.to_string()
+
+# Insert ? after the first 42 characters and then after every 47 characters
+# The first line is shorter because v115@ is placed at the beginning of the data
+def split_lines(data: str, first_length: int = 42) -> List[str]:
+    if len(data) <= first_length:
+        return [data]
+
+    return [data[0:first_length]] + [data[index:index + 47] for index in range(first_length, len(data), 47)]
+
+# Encoder keeping its state between pages so that each appended page costs the same regardless of the game length
+class FumenEncoder():
+    fumen_buffer: FumenBuffer
+    prev_field: InnerField
+    last_repeat_index: int
+    prev_comment: Optional[str]
+    prev_quiz: Optional[Quiz]
+    page_count: int
+
+    __action_encoder: ActionEncoder
+    # Characters of the values that can no longer change, and the complete ?-separated lines made from them
+    __text: str
+    __lines: str
+    __lines_length: int
+
+    def __init__(self):
+        self.fumen_buffer = FumenBuffer()
+        self.prev_field = create_new_inner_field()
+        self.last_repeat_index = -1
+        self.prev_comment = ''
+        self.prev_quiz = None
+        self.page_count = 0
+
+        self.__action_encoder = ActionEncoder(FieldConstants.WIDTH, FieldConstants.HEIGHT, FieldConstants.GARBAGE_LINE)
+        self.__text = ''
+        self.__lines = ''
+        self.__lines_length = 0
+
+    def append_page(self, current_page: Page):
+        fumen_buffer = self.fumen_buffer
+        prev_field = self.prev_field
+        prev_comment = self.prev_comment
+        prev_quiz = self.prev_quiz
+
+        index = self.page_count
+        current_page.flags = current_page.flags if current_page.flags is not None else Flags()
 
-        elif last_repeat_index < 0 or fumen_buffer.get(last_repeat_index) == FumenBuffer.table_length - 1:
-            # Record a field and start repeating
-            fumen_buffer.merge(values)
-            fumen_buffer.push(0)
-            last_repeat_index = fumen_buffer.length() - 1
+        # The page field is only read here, it is copied when the piece is locked
+        current_field: InnerField
+        if isinstance(current_page, Page):
+            current_field = current_page._borrow_inner_field()
 
-        elif fumen_buffer.get(last_repeat_index) < FumenBuffer.table_length - 1:
-            # Do not record the field, advance the repeat
-            current_repeat_value = fumen_buffer.get(last_repeat_index)
-            fumen_buffer.set(last_repeat_index, current_repeat_value + 1)
+        elif current_page.field is not None:
+            current_field = create_inner_field(current_page.field)
+
+        else:
+            current_field = prev_field
+
+        # Field update
+        self.push_field(*encode_field(prev_field, current_field))
 
         # Update action
         current_comment = (current_page.comment if index != 0 or current_page.comment != '' else None) if current_page.comment is not None else None
@@ -154,57 +204,70 @@ def encode(pages: List[Page]) -> str:
                         next_comment is not None,
                         ensure_bool(current_flags.lock),)
 
-        action_number = action_encoder.encode(action)
+        action_number = self.__action_encoder.encode(action)
 
         fumen_buffer.push(action_number, 3)
 
         # Comment update
         if next_comment is not None:
-            comment: str = escape(current_page.comment)
-            comment_length = min(len(comment), 4095)
+            self.push_comment(escape(current_page.comment))
 
-            fumen_buffer.push(comment_length, 2)
+        elif current_page.comment is None:
+            prev_comment = None
 
-            # Encode comments
-            for index in range(0, comment_length, 4):
-                value = 0
-                for count in range (4):
-                    new_index = index + count
-                    if comment_length <= new_index:
-                        break
+        # terrain update
+        prev_field = lock_field(current_field, action)
 
-                    ch = comment[new_index]
-                    value += CommentParser.encode(ch, count)
+        self.prev_field = prev_field
+        self.prev_comment = prev_comment
+        self.prev_quiz = prev_quiz
+        self.page_count += 1
 
-                fumen_buffer.push(value, 5)
+    # Record a field from encode_field(), an unchanged field is counted in the open repeat value when possible
+    def push_field(self, changed: bool, values: FumenBuffer):
+        fumen_buffer = self.fumen_buffer
 
-        elif current_page.comment is None:
-            prev_comment = None
+        if changed:
+            # Record field and end repeat
+            fumen_buffer.merge(values)
+            self.last_repeat_index = -1
 
-        # terrain update
-        if action.lock:
-            if is_mino_piece(action.piece.piece_type):
-                current_field.fill(action.piece)
+        elif self.last_repeat_index < 0 or fumen_buffer.get(self.last_repeat_index) == FumenBuffer.table_length - 1:
+            # Record a field and start repeating
+            fumen_buffer.merge(values)
+            fumen_buffer.push(0)
+            self.last_repeat_index = fumen_buffer.length() - 1
+
+        elif fumen_buffer.get(self.last_repeat_index) < FumenBuffer.table_length - 1:
+            # Do not record the field, advance the repeat
+            current_repeat_value = fumen_buffer.get(self.last_repeat_index)
+            fumen_buffer.set(self.last_repeat_index, current_repeat_value + 1)
+
+    # Record an escaped comment, it is cut at 4095 characters
+    def push_comment(self, comment: str):
+        comment_length = min(len(comment), 4095)
 
-            current_field.clear_line()
+        self.fumen_buffer.push(comment_length, 2)
 
-            if action.rise:
-                current_field.rise_garbage()
+        # Encode comments
+        self.fumen_buffer.push_values(CommentParser.encode_text(comment[:comment_length]), 5)
 
-            if action.mirror:
-                current_field.mirror()
+    def to_string(self) -> str:
+        # Values before the open repeat counter never change again, they are converted only once
+        stable = self.last_repeat_index if 0 <= self.last_repeat_index else self.fumen_buffer.length()
+        if len(self.__text) < stable:
+            self.__text += self.fumen_buffer.to_string(len(self.__text), stable)
 
-            prev_field = current_field
+        lines: List[str] = []
+        line_length = 42 if self.__lines_length == 0 else 47
+        while self.__lines_length + line_length < len(self.__text):
+            lines.append(self.__text[self.__lines_length:self.__lines_length + line_length] + '?')
+            self.__lines_length += line_length
+            line_length = 47
 
-    # If the teto score is short, output it as is
-    # A ? is inserted every 47 characters, but v115@ is actually placed at the beginning, so the first ? is 42 characters later.
-    data = fumen_buffer.to_string()
-    if len(data) < 41:
-        return VERSION_INFO + data
+        self.__lines += ''.join(lines)
 
-    # ?to insert
-    head = [data[0:42]]
-    tails = data[42:]
-    split = findall("[\S]{1,47}", tails)
+        data = self.__text[self.__lines_length:] + self.fumen_buffer.to_string(len(self.__text))
+        first_length = 42 if self.__lines_length == 0 else 47
 
-    return VERSION_INFO + '?'.join(head + split)
+        return VERSION_INFO + self.__lines + '?'.join(split_lines(data, first_length))
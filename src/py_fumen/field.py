@@ -4,24 +4,21 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
-from .inner_field import get_block_xys, InnerField, PlayField
+from .inner_field import FieldSnapshot, InnerField, PlayField, XY
+from .geometry import SORTED_BLOCKS
 from .defines import parse_piece, parse_piece_name, parse_rotation
-from .constants import FieldConstants
 
 @dataclass
 class Operation():
+    __slots__ = ('piece_type', 'rotation', 'x', 'y')
     piece_type: str
     rotation: str
     x: int
     y: int
 
-@dataclass
-class XY():
-    x: int
-    y: int
-
 @dataclass
 class Mino():
+    __slots__ = ('piece_type', 'rotation', 'x', 'y')
     piece_type: str
     rotation: str
     x: int
@@ -36,7 +33,8 @@ class Mino():
         return xy.y, xy.x
 
     def positions(self) -> List[XY]:
-        return sorted(get_block_xys(parse_piece(self.piece_type), parse_rotation(self.rotation), self.x, self.y), key=self.get_sort_xy)
+        x, y = self.x, self.y
+        return [XY(x + dx, y + dy) for dx, dy in SORTED_BLOCKS[parse_piece(self.piece_type)][parse_rotation(self.rotation)]]
 
     def operation(self) -> Operation:
         return Operation(self.piece_type, self.rotation, self.x, self.y)
@@ -59,9 +57,19 @@ def to_mino(operation_or_mino: Operation | Mino) -> Mino:
 
 class Field():
     __field: InnerField
+    __shared: bool
 
-    def __init__(self, field: InnerField):
+    # A shared field is copied before it is first modified
+    def __init__(self, field: InnerField, shared: bool = False):
         self.__field = field
+        self.__shared = shared
+
+    def __writable_field(self) -> InnerField:
+        if self.__shared:
+            self.__field = self.__field.copy()
+            self.__shared = False
+
+        return self.__field
 
     @staticmethod
     def create(field: Optional[str], garbage: Optional[str]) -> Field:
@@ -96,7 +104,7 @@ class Field():
         if not (force or self.can_fill(mino)):
             raise self.FillException('Cannot fill piece on field')
 
-        self.__field.fill_all(mino.positions(), parse_piece(mino.type))
+        self.__writable_field().fill_all(mino.positions(), parse_piece(mino.piece_type))
 
         return mino
 
@@ -108,31 +116,46 @@ class Field():
             return None
 
         mino = to_mino(operation)
+        piece = parse_piece(mino.piece_type)
+        rotation = parse_rotation(mino.rotation)
 
-        while 0 <= mino.y:
-            if not self.can_lock(mino):
-                continue
-
-            mino.y -= 1
+        # Land on the column surface when the piece starts above it
+        drop_y = self.__field.get_drop_y(piece, rotation, mino.x)
+        if drop_y is None:
+            raise self.PutException('Cannot put piece on field')
 
+        if drop_y <= mino.y and self.__field.can_fill(piece, rotation, mino.x, drop_y):
+            mino.y = drop_y
             self.fill(mino)
-
             return mino
 
+        # Otherwise search downward for the first lockable position under the stack surface
+        y = min(mino.y, drop_y - 1)
+        while 0 <= y:
+            if self.__field.can_fill(piece, rotation, mino.x, y) and self.__field.is_on_ground(piece, rotation, mino.x, y):
+                mino.y = y
+                self.fill(mino)
+                return mino
+
+            y -= 1
+
         raise self.PutException('Cannot put piece on field')
 
     def clear_line(self):
-        self.__field.clear_line()
+        self.__writable_field().clear_line()
 
     def at(self, x: int, y: int) -> str:
         return parse_piece_name(self.__field.get_number_at(x, y))
 
     def set(self, x: int, y: int, type: str):
-        self.__field.set_number_at(x, y, parse_piece(type))
+        self.__writable_field().set_number_at(x, y, parse_piece(type))
 
     def copy(self) -> Field:
         return Field(self.__field.copy())
 
+    def snapshot(self) -> FieldSnapshot:
+        return self.__field.snapshot()
+
     @dataclass
     class Option():
         reduced: Optional[bool] = None
@@ -165,10 +188,4 @@ def create_new_inner_field() -> InnerField:
     return InnerField()
 
 def create_inner_field(field: Field) -> InnerField:
-    inner_field = InnerField()
-    for y in range(-1, FieldConstants.HEIGHT):
-        for x in range(0,  FieldConstants.WIDTH):
-            at = field.at(x, y)
-            inner_field.set_number_at(x, y, parse_piece(at))
-
-    return inner_field
\ No newline at end of file
+    return field.snapshot().to_inner_field()
\ No newline at end of file
@@ -1,13 +1,23 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import annotations
-from typing import List
-from math import floor
+from typing import List, Optional
 
 ENCODE_TABLE = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
 
+# Byte value -> table index, 0xFF for characters outside of ENCODE_TABLE
+INVALID_VALUE = 0xFF
+DECODE_TABLE = bytes(ENCODE_TABLE.index(chr(byte)) if chr(byte) in ENCODE_TABLE else INVALID_VALUE for byte in range(256))
+
 def decode_to_value(v: str) -> int:
-    return ENCODE_TABLE.index(v)
+    value = DECODE_TABLE[ord(v)] if ord(v) < 256 else INVALID_VALUE
+    if value == INVALID_VALUE:
+        raise ValueError(f'Unexpected character: {v}')
+
+    return value
+
+# Table index -> byte of its character, for bytes.translate
+ENCODE_BYTES = ENCODE_TABLE.encode('ascii') + bytes(256 - len(ENCODE_TABLE))
 
 def encode_from_value(index: int) -> str:
     return ENCODE_TABLE[index]
@@ -16,37 +26,73 @@ class FumenBuffer(object):
     table_length: int = len(ENCODE_TABLE)
 
     values: List[int]
+    __cursor: int
 
     class FumenException(Exception):
         pass
 
     def __init__(self, data: str = "") -> None:
         try:
-            self.values = [ENCODE_TABLE.index(char) for char in [*data]]
+            decoded = data.encode('ascii').translate(DECODE_TABLE)
 
-        except:
+        except UnicodeEncodeError:
             raise self.FumenException('Unexpected fumen')
 
+        if INVALID_VALUE in decoded:
+            raise self.FumenException('Unexpected fumen')
+
+        self.values = list(decoded)
+        self.__cursor = 0
+
         return
 
+    # Read values from the cursor without consuming the underlying list
     def poll(self, maximum: int) -> int:
+        start = self.__cursor
+        end = start + maximum
+        if len(self.values) < end:
+            raise self.FumenException('Unexpected fumen')
+
         value = 0
+        for index in range(end - 1, start - 1, -1):
+            value = value * self.table_length + self.values[index]
+
+        self.__cursor = end
 
-        for count in range(maximum):
-            v = self.values.pop(0)
+        return value
 
-            if v is None:
-                raise self.FumenException('Unexpected fumen')
+    # Read count values of maximum characters each
+    def poll_values(self, count: int, maximum: int) -> List[int]:
+        start = self.__cursor
+        end = start + count * maximum
+        if len(self.values) < end:
+            raise self.FumenException('Unexpected fumen')
 
-            value += v * self.table_length ** count
+        values = self.values[start + maximum - 1:end:maximum]
+        for digit in range(maximum - 2, -1, -1):
+            values = [value * self.table_length + low for value, low in zip(values, self.values[start + digit:end:maximum])]
 
-        return value
+        self.__cursor = end
+
+        return values
 
     def push(self, value: int, split_count: int = 1):
         current = value
         for count in range(split_count):
-            self.values.append(current % FumenBuffer.table_length)
-            current = floor(current / FumenBuffer.table_length)
+            current, digit = divmod(current, FumenBuffer.table_length)
+            self.values.append(digit)
+
+        return
+
+    # Push values of split_count characters each
+    def push_values(self, values: List[int], split_count: int):
+        digits = [0] * (len(values) * split_count)
+        current = values
+        for count in range(split_count):
+            digits[count::split_count] = [value % FumenBuffer.table_length for value in current]
+            current = [value // FumenBuffer.table_length for value in current]
+
+        self.values += digits
 
         return
 
@@ -56,8 +102,18 @@ class FumenBuffer(object):
 
         return
 
+    def cursor(self) -> int:
+        return self.__cursor
+
+    def set_cursor(self, cursor: int) -> None:
+        if not 0 <= cursor <= len(self.values):
+            raise self.FumenException('Unexpected fumen')
+
+        self.__cursor = cursor
+        return
+
     def is_empty(self) -> bool:
-        return len(self.values) == 0
+        return len(self.values) <= self.__cursor
 
     def length(self) -> int:
         return len(self.values)
@@ -69,5 +125,5 @@ class FumenBuffer(object):
         self.values[index] = value
         return
 
-    def to_string(self) -> str:
-        return ''.join(map(encode_from_value, self.values))
\ No newline at end of file
+    def to_string(self, start: int = 0, end: Optional[int] = None) -> str:
+        return bytes(self.values[start:end]).translate(ENCODE_BYTES).decode('ascii')
\ No newline at end of file
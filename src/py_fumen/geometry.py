@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+from typing import Optional, Tuple
+
+from .defines import Piece, Rotation
+
+Offsets = Tuple[Tuple[int, int], ...]
+Bounds = Tuple[int, int, int, int]
+Profile = Tuple[Tuple[int, int], ...]
+
+# Block offsets of each piece in spawn rotation, (0, 0) is the rotation center
+SPAWN_BLOCKS = {
+    Piece.I: ((0, 0), (-1, 0), (1, 0), (2, 0)),
+    Piece.T: ((0, 0), (-1, 0), (1, 0), (0, 1)),
+    Piece.O: ((0, 0), (1, 0), (0, 1), (1, 1)),
+    Piece.L: ((0, 0), (-1, 0), (1, 0), (1, 1)),
+    Piece.J: ((0, 0), (-1, 0), (1, 0), (-1, 1)),
+    Piece.S: ((0, 0), (-1, 0), (0, 1), (1, 1)),
+    Piece.Z: ((0, 0), (1, 0), (0, 1), (-1, 1)),
+}
+
+# Offset added to the fumen coordinate to get the rotation center, the encoder subtracts it
+COORDINATE_CORRECTIONS = {
+    (Piece.O, Rotation.LEFT): (1, -1),
+    (Piece.O, Rotation.REVERSE): (1, 0),
+    (Piece.O, Rotation.SPAWN): (0, -1),
+    (Piece.I, Rotation.REVERSE): (1, 0),
+    (Piece.I, Rotation.LEFT): (0, -1),
+    (Piece.S, Rotation.SPAWN): (0, -1),
+    (Piece.S, Rotation.RIGHT): (-1, 0),
+    (Piece.Z, Rotation.SPAWN): (0, -1),
+    (Piece.Z, Rotation.LEFT): (1, 0),
+}
+
+def rotate_offsets(blocks: Offsets, rotation: Rotation) -> Offsets:
+    if rotation is Rotation.SPAWN:
+        return blocks
+    if rotation is Rotation.LEFT:
+        return tuple((-dy, dx) for dx, dy in blocks)
+    if rotation is Rotation.REVERSE:
+        return tuple((-dx, -dy) for dx, dy in blocks)
+
+    return tuple((dy, -dx) for dx, dy in blocks)
+
+def bounds_of(blocks: Offsets) -> Bounds:
+    xs = [dx for dx, dy in blocks]
+    ys = [dy for dx, dy in blocks]
+    return (min(xs), max(xs), min(ys), max(ys))
+
+# Lowest block of each column as (dx, dy), left to right
+def bottom_profile_of(blocks: Offsets) -> Profile:
+    bottoms = {}
+    for dx, dy in blocks:
+        bottoms[dx] = min(dy, bottoms.get(dx, dy))
+
+    return tuple(sorted(bottoms.items()))
+
+# Occupancy mask of each row as (dy, mask), bit 0 of the mask is the leftmost column of the piece
+def row_masks_of(blocks: Offsets) -> Tuple[Tuple[int, int], ...]:
+    left = bounds_of(blocks)[0]
+    masks = {}
+    for dx, dy in blocks:
+        masks[dy] = masks.get(dy, 0) | 1 << (dx - left)
+
+    return tuple(sorted(masks.items()))
+
+def build_table(function) -> Tuple[Optional[Tuple], ...]:
+    return tuple(
+        tuple(function(piece, Rotation(rotation)) for rotation in range(len(Rotation))) if piece in SPAWN_BLOCKS else None
+        for piece in Piece
+    )
+
+# Tables indexed by [piece][rotation], entries of EMPTY and GRAY are None
+BLOCKS = build_table(lambda piece, rotation: rotate_offsets(SPAWN_BLOCKS[piece], rotation))
+SORTED_BLOCKS = build_table(lambda piece, rotation: tuple(sorted(BLOCKS[piece][rotation], key=lambda block: (block[1], block[0]))))
+BOUNDS = build_table(lambda piece, rotation: bounds_of(BLOCKS[piece][rotation]))
+BOTTOM_PROFILES = build_table(lambda piece, rotation: bottom_profile_of(BLOCKS[piece][rotation]))
+ROW_MASKS = build_table(lambda piece, rotation: row_masks_of(BLOCKS[piece][rotation]))
+CORRECTIONS = build_table(lambda piece, rotation: COORDINATE_CORRECTIONS.get((piece, rotation), (0, 0)))
+
+# Rotations tried in this order when picking the canonical one of identical placements
+CANONICAL_ORDER = (Rotation.SPAWN, Rotation.RIGHT, Rotation.REVERSE, Rotation.LEFT)
+
+# (canonical rotation, dx, dy) that places the same cells as (rotation, x, y) at (x + dx, y + dy)
+def canonical_of(piece: Piece, rotation: Rotation) -> Tuple[Rotation, int, int]:
+    left, right, bottom, top = BOUNDS[piece][rotation]
+    shape = sorted((dx - left, dy - bottom) for dx, dy in BLOCKS[piece][rotation])
+    for canonical in CANONICAL_ORDER:
+        canonical_left, _, canonical_bottom, _ = BOUNDS[piece][canonical]
+        if shape == sorted((dx - canonical_left, dy - canonical_bottom) for dx, dy in BLOCKS[piece][canonical]):
+            return (canonical, left - canonical_left, bottom - canonical_bottom)
+
+    return (rotation, 0, 0)
+
+CANONICALS = build_table(canonical_of)
@@ -4,10 +4,10 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import List, Optional
 from math import floor
-from copy import deepcopy
 
 from .defines import InnerOperation, parse_piece, Piece, Rotation
 from .constants import FieldConstants
+from .geometry import BLOCKS, BOTTOM_PROFILES, BOUNDS, ROW_MASKS, Offsets
 
 class PieceException(Exception):
     pass
@@ -16,22 +16,10 @@ class RotationException(Exception):
     pass
 
 def get_pieces(piece: Piece) -> List[List[int]]:
-    if piece is Piece.I:
-        return [[0, 0], [-1, 0], [1, 0], [2, 0]]
-    if piece is Piece.T:
-        return [[0, 0], [-1, 0], [1, 0], [0, 1]]
-    if piece is Piece.O:
-        return [[0, 0], [1, 0], [0, 1], [1, 1]]
-    if piece is Piece.L:
-        return [[0, 0], [-1, 0], [1, 0], [1, 1]]
-    if piece is Piece.J:
-        return [[0, 0], [-1, 0], [1, 0], [-1, 1]]
-    if piece is Piece.S:
-        return [[0, 0], [-1, 0], [0, 1], [1, 1]]
-    if piece is Piece.Z:
-        return [[0, 0], [1, 0], [0, 1], [-1, 1]]
-
-    raise PieceException('Unsupported piece')
+    if BLOCKS[piece] is None:
+        raise PieceException('Unsupported piece')
+
+    return [list(block) for block in BLOCKS[piece][Rotation.SPAWN]]
 
 def rotate_right(positions: List[List[int]]) -> List[List[int]]:
     return [[current[1], -current[0]] for current in positions]
@@ -42,51 +30,120 @@ def rotate_left(positions: List[List[int]]) -> List[List[int]]:
 def rotate_reverse(positions: List[List[int]]) -> List[List[int]]:
     return [[-current[0], -current[1]] for current in positions]
 
-def get_blocks(piece: Piece, rotation: Rotation) -> List[List[int]]:
-    blocks = get_pieces(piece)
-    if rotation is Rotation.SPAWN:
-        return blocks
-    if rotation is Rotation.LEFT:
-        return rotate_left(blocks)
-    if rotation is Rotation.REVERSE:
-        return rotate_reverse(blocks)
-    if rotation is Rotation.RIGHT:
-        return rotate_right(blocks)
+# Shared precomputed offsets, must not be modified
+def get_blocks(piece: Piece, rotation: Rotation) -> Offsets:
+    if BLOCKS[piece] is None:
+        raise PieceException('Unsupported piece')
+    if not isinstance(rotation, Rotation):
+        raise RotationException('Unsupported rotation')
 
-    raise RotationException('Unsupported rotation')
+    return BLOCKS[piece][rotation]
 
 def get_block_positions(piece: Piece, rotation: Rotation, x: int, y: int) -> List[List[int]]:
     return [[position[0]+x, position[1]+y] for position in get_blocks(piece, rotation)]
 
-@dataclass
+@dataclass(frozen=True)
 class XY():
+    __slots__ = ('x', 'y')
     x: int
     y: int
 
+    def __reduce__(self):
+        return (XY, (self.x, self.y))
+
 def get_block_xys(piece: Piece, rotation: Rotation, x: int, y: int) -> List[XY]:
     return [XY(position[0]+x, position[1]+y) for position in get_blocks(piece, rotation)]
 
+# Occupancy bit of column x is (1 << x), a filled row equals FULL_ROW
+FULL_ROW = (1 << FieldConstants.WIDTH) - 1
+MIRROR_ROW = [int(format(mask, f'0{FieldConstants.WIDTH}b')[::-1], 2) for mask in range(FULL_ROW + 1)]
+
+# Cell value -> Piece, cells are stored as raw Piece values
+PIECES = tuple(Piece(value) for value in range(len(Piece)))
+EMPTY_ROW = bytes(FieldConstants.WIDTH)
+
+# Cell value -> 1 when occupied, and a row of those 0/1 bytes -> its occupancy mask
+OCCUPANCY = bytes(0 if value == 0 else 1 for value in range(256))
+ROW_MASK_OF = { bytes((mask >> x) & 1 for x in range(FieldConstants.WIDTH)): mask for mask in range(FULL_ROW + 1) }
+
+def to_row_masks(pieces: bytearray) -> List[int]:
+    occupied = bytes(pieces).translate(OCCUPANCY)
+    return [ROW_MASK_OF[occupied[start:start + FieldConstants.WIDTH]] for start in range(0, len(occupied) // FieldConstants.WIDTH * FieldConstants.WIDTH, FieldConstants.WIDTH)]
+
+def to_column_heights(rows: List[int]) -> List[int]:
+    heights = [0] * FieldConstants.WIDTH
+    remaining = FULL_ROW
+    for y in range(len(rows) - 1, -1, -1):
+        found = rows[y] & remaining
+        remaining &= ~found
+        while found:
+            bit = found & -found
+            heights[bit.bit_length() - 1] = y + 1
+            found ^= bit
+
+        if not remaining:
+            break
+
+    return heights
+
 class PlayField():
-    __pieces: List[Piece]
+    __slots__ = ('__pieces', '__rows', '__heights', '__length')
+    __pieces: bytearray
+    __rows: List[int]
+    __heights: Optional[List[int]]
     __length: int
 
-    def __init__(self, pieces: List[Piece] = None, length: int = FieldConstants.PLAY_BLOCKS):
-        if pieces is not None:
+    def __init__(self, pieces: Optional[bytearray | List[Piece]] = None, length: int = FieldConstants.PLAY_BLOCKS, rows: Optional[List[int]] = None):
+        if pieces is None:
+            self.__pieces = bytearray(length)
+        elif isinstance(pieces, bytearray):
             self.__pieces = pieces
         else:
-            self.__pieces = [Piece.EMPTY for i in range(length)]
-        
+            self.__pieces = bytearray(pieces)
+
+        # Row occupancy bitboard kept in sync with the pieces
+        self.__rows = rows if rows is not None else to_row_masks(self.__pieces)
+        # Column surface heights (top filled y + 1), computed on demand then kept up to date
+        self.__heights = None
         self.__length = length
 
     def get(self, x: int, y: int) -> Piece:
-        return self.__pieces[x + y * FieldConstants.WIDTH]
+        return PIECES[self.__pieces[x + y * FieldConstants.WIDTH]]
+
+    def get_row(self, y: int) -> int:
+        return self.__rows[y]
+
+    def is_empty_at(self, x: int, y: int) -> bool:
+        return not self.__rows[y] >> x & 1
+
+    def get_heights(self) -> List[int]:
+        if self.__heights is None:
+            self.__heights = to_column_heights(self.__rows)
+
+        return self.__heights
 
     def add_offset(self, x: int, y: int, value: int):
-        self.__pieces[x + y * FieldConstants.WIDTH] = Piece(self.__pieces[x + y * FieldConstants.WIDTH].value+value)
+        index = x + y * FieldConstants.WIDTH
+        value += self.__pieces[index]
+        if not Piece.EMPTY <= value <= Piece.GRAY:
+            raise ValueError(f'{value} is not a valid Piece')
+
+        self.set_at(index, value)
         return
 
     def set_at(self, index: int, piece: Piece):
         self.__pieces[index] = piece
+
+        y, x = divmod(index, FieldConstants.WIDTH)
+        heights = self.__heights
+        if not piece:
+            self.__rows[y] &= ~(1 << x)
+            if heights is not None and heights[x] == y + 1:
+                self.__heights = None
+        else:
+            self.__rows[y] |= 1 << x
+            if heights is not None and heights[x] <= y:
+                heights[x] = y + 1
         return
 
     def set(self, x: int, y: int, piece: Piece):
@@ -120,91 +177,127 @@ class PlayField():
         return PlayField.load_inner(blocks, len(blocks))
 
     def fill(self, operation: InnerOperation):
-        blocks = get_blocks(operation.piece_type, operation.rotation)
-        for block in blocks:
-            nx, ny = operation.x + block[0], operation.y + block[1]
-            self.set(nx, ny, operation.piece_type)
+        piece_type, x, y = operation.piece_type, operation.x, operation.y
+        for dx, dy in get_blocks(piece_type, operation.rotation):
+            self.set(x + dx, y + dy, piece_type)
 
     def fill_all(self, positions: List[XY], piece_type: Piece):
         for xy in positions:
             self.set(xy.x, xy.y, piece_type)
 
-    def clear_line(self):
-        new_field = deepcopy(self.__pieces)
-        top = int(len(self.__pieces) / FieldConstants.WIDTH - 1)
+    def has_full_line(self) -> bool:
+        return FULL_ROW in self.__rows
 
-        for y in range(top, -1, -1):
-            line = self.__pieces[y * FieldConstants.WIDTH : (y + 1) * FieldConstants.WIDTH]
-            is_filled = Piece.EMPTY not in line
-            if is_filled:
-                bottom = new_field[0:y * FieldConstants.WIDTH]
-                over = new_field[(y + 1) * FieldConstants.WIDTH:]
-                new_field = bottom + over + ([Piece.EMPTY] * FieldConstants.WIDTH)
-
-        self.__pieces = new_field
+    def clear_line(self):
+        if FULL_ROW not in self.__rows:
+            return
+
+        pieces = bytearray()
+        rows: List[int] = []
+        cleared_rows: List[int] = []
+        for y, mask in enumerate(self.__rows):
+            if mask != FULL_ROW:
+                pieces += self.__pieces[y * FieldConstants.WIDTH : (y + 1) * FieldConstants.WIDTH]
+                rows.append(mask)
+            else:
+                cleared_rows.append(y)
+
+        cleared = len(cleared_rows)
+        self.__pieces = pieces + EMPTY_ROW * cleared
+        self.__rows = rows + [0] * cleared
+
+        if self.__heights is not None:
+            self.__heights = [self.__cleared_height(x, height, cleared_rows) for x, height in enumerate(self.__heights)]
+
+    # Column height after the lines are cleared, scans down only when the top block itself was cleared
+    def __cleared_height(self, x: int, height: int, cleared_rows: List[int]) -> int:
+        below = sum(1 for y in cleared_rows if y < height)
+        if height - 1 not in cleared_rows:
+            return height - below
+
+        for y in range(height - below - 1, -1, -1):
+            if self.__rows[y] >> x & 1:
+                return y + 1
+
+        return 0
 
     def up(self, block_up: PlayField):
+        height = len(self.__rows)
+        if self.__heights is not None and max(self.__heights) + len(block_up.__rows) <= height:
+            self.__heights = [h + len(block_up.__rows) if h else up_height for h, up_height in zip(self.__heights, block_up.get_heights())]
+        else:
+            self.__heights = None
+
         self.__pieces = (block_up.__pieces + (self.__pieces))[0:self.__length]
+        self.__rows = (block_up.__rows + self.__rows)[0:height]
 
     def mirror(self):
-        new_field: List[Piece] = []
-        for y in range(len(self.__pieces)):
-            line = self.__pieces[y * FieldConstants.WIDTH : (y + 1) * FieldConstants.WIDTH]
+        for y in range(len(self.__rows)):
+            start = y * FieldConstants.WIDTH
+            line = self.__pieces[start : start + FieldConstants.WIDTH]
             line.reverse()
-            for obj in line:
-                new_field.append(obj)
+            self.__pieces[start : start + FieldConstants.WIDTH] = line
 
-        self.__pieces = new_field
+        self.__rows = [MIRROR_ROW[mask] for mask in self.__rows]
+        if self.__heights is not None:
+            self.__heights.reverse()
 
     def shift_to_left(self):
-        height = int(self.__pieces.length / 10)
-        for y in range(height):
-            for x in range(FieldConstants.WIDTH - 1):
-                self.__pieces[x + y * FieldConstants.WIDTH] = self.__pieces[x + 1 + y * FieldConstants.WIDTH]
-            self.__pieces[9 + y * FieldConstants.WIDTH] = Piece.EMPTY
+        for y in range(len(self.__rows)):
+            start = y * FieldConstants.WIDTH
+            self.__pieces[start : start + FieldConstants.WIDTH - 1] = self.__pieces[start + 1 : start + FieldConstants.WIDTH]
+            self.__pieces[start + FieldConstants.WIDTH - 1] = Piece.EMPTY
+
+        self.__rows = [mask >> 1 for mask in self.__rows]
+        self.__heights = None
 
     def shift_to_right(self):
-        height = self.__pieces.length / 10
-        for y in range(height):
-            for x in range(FieldConstants.WIDTH - 1, -1, -1):
-                self.__pieces[x + y * FieldConstants.WIDTH] = self.__pieces[x - 1 + y * FieldConstants.WIDTH]
+        for y in range(len(self.__rows)):
+            start = y * FieldConstants.WIDTH
+            self.__pieces[start + 1 : start + FieldConstants.WIDTH] = self.__pieces[start : start + FieldConstants.WIDTH - 1]
+            self.__pieces[start] = Piece.EMPTY
 
-            self.__pieces[y * FieldConstants.WIDTH] = Piece.EMPTY
+        self.__rows = [(mask << 1) & FULL_ROW for mask in self.__rows]
+        self.__heights = None
 
     def shift_to_up(self):
-        blanks = [Piece.EMPTY] * FieldConstants.WIDTH
-        self.__pieces = (blanks + self.__pieces)[0 : self.__length]
+        self.__pieces = (bytearray(EMPTY_ROW) + self.__pieces)[0 : self.__length]
+        self.__rows = ([0] + self.__rows)[0 : len(self.__rows)]
+        self.__heights = None
 
     def shift_to_bottom(self):
-        blanks = [Piece.EMPTY] * FieldConstants.WIDTH
-        self.__pieces = self.__pieces[10:self.__length] + blanks
+        self.__pieces = self.__pieces[10:self.__length] + EMPTY_ROW
+        self.__rows = self.__rows[1:] + [0]
+        self.__heights = None
 
     def to_array(self) -> List[Piece]:
-        return deepcopy(self.__pieces)
+        return [PIECES[value] for value in self.__pieces]
+
+    def to_row_array(self) -> List[int]:
+        return list(self.__rows)
 
     def num_of_blocks(self) -> int:
         return len(self.__pieces)
 
     def copy(self) -> PlayField:
-        return PlayField(pieces = deepcopy(self.__pieces), length = self.__length)
+        field = PlayField(pieces = self.__pieces[:], length = self.__length, rows = self.__rows[:])
+        field.__heights = self.__heights[:] if self.__heights is not None else None
+        return field
 
-    def to_shallow_array(self) -> List[Piece]:
+    # Raw cell storage, one Piece value per byte
+    def to_shallow_array(self) -> bytearray:
         return self.__pieces
 
     def clear_all(self):
-        self.__pieces = [Piece.EMPTY] * len(self.__pieces)
+        self.__pieces = bytearray(len(self.__pieces))
+        self.__rows = [0] * len(self.__rows)
+        self.__heights = [0] * FieldConstants.WIDTH
 
     def equals(self, other: PlayField) -> bool:
-        if len(self.__pieces) != len(other.__pieces):
-            return False
-
-        for index in range(len(self.__pieces)):
-            if self.__pieces[index] != other.__pieces[index]:
-                return False
-
-        return True
+        return self.__pieces == other.__pieces
 
 class InnerField():
+    __slots__ = ('__field', '__garbage')
     __field: PlayField
     __garbage: PlayField
 
@@ -227,16 +320,41 @@ class InnerField():
         self.__field.fill_all(positions, type)
 
     def can_fill(self, piece: Piece, rotation: Rotation, x: int, y: int) -> bool:
-        positions = get_block_positions(piece, rotation, x, y)
+        if BOUNDS[piece] is None:
+            raise PieceException('Unsupported piece')
 
-        return all(0 <= px and px < 10 and 0 <= py and py < FieldConstants.HEIGHT and self.get_number_at(px, py) is Piece.EMPTY for px, py in positions)
+        left, right, bottom, top = BOUNDS[piece][rotation]
+        if x + left < 0 or FieldConstants.WIDTH <= x + right or y + bottom < 0 or FieldConstants.HEIGHT <= y + top:
+            return False
+
+        shift = x + left
+        return not any(self.__field.get_row(y + dy) & mask << shift for dy, mask in ROW_MASKS[piece][rotation])
 
     def can_fill_all(self, positions: List[XY]) -> bool:
-        return all(0 <= position.x and position.x < 10 and 0 <= position.y and position.y < FieldConstants.HEIGHT and self.get_number_at(position.x, position.y) is Piece.EMPTY for position in positions)
+        return all(0 <= position.x and position.x < 10 and 0 <= position.y and position.y < FieldConstants.HEIGHT and self.__field.is_empty_at(position.x, position.y) for position in positions)
 
     def is_on_ground(self, piece: Piece, rotation: Rotation, x: int, y: int):
         return not self.can_fill(piece, rotation, x, y - 1)
 
+    # Surface height of each play field column, the highest filled y + 1
+    def get_heights(self) -> List[int]:
+        return list(self.__field.get_heights())
+
+    # Lowest y reachable by dropping the piece straight down from above the stack, None when x is outside of the field
+    def get_drop_y(self, piece: Piece, rotation: Rotation, x: int) -> Optional[int]:
+        if BOUNDS[piece] is None:
+            raise PieceException('Unsupported piece')
+
+        left, right, bottom, top = BOUNDS[piece][rotation]
+        if x + left < 0 or FieldConstants.WIDTH <= x + right:
+            return None
+
+        heights = self.__field.get_heights()
+        return max(heights[x + dx] - dy for dx, dy in BOTTOM_PROFILES[piece][rotation])
+
+    def has_full_line(self) -> bool:
+        return self.__field.has_full_line()
+
     def clear_line(self):
         self.__field.clear_line()
 
@@ -263,7 +381,7 @@ class InnerField():
         return InnerField(field=self.__field.copy(), garbage=self.__garbage.copy())
 
     def equals(self, other: InnerField) -> bool:
-        return self.__field.equals(other.field) and self.__garbage.equals(other.garbage)
+        return self.__field.equals(other.__field) and self.__garbage.equals(other.__garbage)
 
     def add_number(self, x: int, y: int, value: int):
         if 0 <= y:
@@ -283,6 +401,10 @@ class InnerField():
     def get_number_at(self, x: int, y: int) -> Piece:
         return self.__field.get(x, y) if 0 <= y else self.__garbage.get(x, -(y + 1))
 
+    # Occupancy bitmask of a row, bit x is set when (x, y) is filled
+    def get_row_at(self, y: int) -> int:
+        return self.__field.get_row(y) if 0 <= y else self.__garbage.get_row(-(y + 1))
+
     def get_number_at_index(self, index: int, is_field: bool) -> Piece:
         if is_field:
             return self.get_number_at(index % 10, floor(index / 10))
@@ -292,4 +414,31 @@ class InnerField():
         return self.__field.to_array()
 
     def to_garbage_number_array(self) -> List[Piece]:
-        return self.__garbage.to_array()
\ No newline at end of file
+        return self.__garbage.to_array()
+
+    # Garbage row followed by the play field from the bottom, one Piece value per byte
+    def to_bytes(self) -> bytes:
+        return bytes(self.__garbage.to_shallow_array() + self.__field.to_shallow_array())
+
+    def snapshot(self) -> FieldSnapshot:
+        return FieldSnapshot(self.to_bytes())
+
+    @staticmethod
+    def from_bytes(cells: bytes | memoryview) -> InnerField:
+        return InnerField(field=PlayField(pieces=bytearray(cells[FieldConstants.WIDTH:])),
+                          garbage=PlayField(pieces=bytearray(cells[:FieldConstants.WIDTH]), length=FieldConstants.WIDTH))
+
+# Immutable field state usable as a dict/set key
+# cells is the InnerField.to_bytes() layout, its hash is computed once by bytes and cached
+@dataclass(frozen=True)
+class FieldSnapshot():
+    cells: bytes
+
+    def __hash__(self) -> int:
+        return hash(self.cells)
+
+    def get_number_at(self, x: int, y: int) -> Piece:
+        return PIECES[self.cells[x + (y + FieldConstants.GARBAGE_LINE) * FieldConstants.WIDTH]]
+
+    def to_inner_field(self) -> InnerField:
+        return InnerField.from_bytes(self.cells)
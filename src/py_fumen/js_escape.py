@@ -4,29 +4,54 @@ import re
 
 ORIGINAL_TABLE = "0123456789QWERTYUIOPASDFGHJKLZXCVBNMqwertyuiopasdfghjklzxcvbnm@*_+-./"
 
+def escape_char(char_index: int) -> str:
+    char = chr(char_index)
+    if char in ORIGINAL_TABLE:
+        return char
+
+    # Hex digits are zero padded like javascript's escape(), unescape() only reads %XX and %uXXXX
+    if char_index < 16**2:
+        return f"%{char_index:02X}"
+
+    return f"%u{char_index:04X}"
+
+# str.translate table, characters outside of Latin-1 are escaped on first use
+# Only the Basic Multilingual Plane is kept so that the table stays bounded
+class EscapeTable(dict):
+    def __missing__(self, char_index: int) -> str:
+        escaped = escape_char(char_index)
+        if char_index < 16**4:
+            self[char_index] = escaped
+
+        return escaped
+
+ESCAPE_TABLE = EscapeTable((char_index, escape_char(char_index)) for char_index in range(16**2))
+
 def escape(string: str):
-    result = ""
-    for char in string:
-        if char in ORIGINAL_TABLE:
-            result += char
+    return string.translate(ESCAPE_TABLE)
 
-        else:
-            char_index = ord(char)
-            
-            if char_index < 16**2:
-                result += "%" + str(hex(char_index))[2:].upper()
+UNESCAPE_PATTERN = re.compile(r'%u([a-fA-F0-9]{4})|%([a-fA-F0-9]{2})')
 
-            else:
-                result += "%u" + str(hex(char_index))[2:].upper()
+# Escape sequence -> character, filled on first use up to UNESCAPE_CACHE_SIZE entries
+UNESCAPE_CACHE_SIZE = 16**4
 
-    return result
+class UnescapeTable(dict):
+    def __missing__(self, escaped: str) -> str:
+        char = chr(int(escaped[2:] if escaped[1] == 'u' else escaped[1:], 16))
+        if len(self) < UNESCAPE_CACHE_SIZE:
+            self[escaped] = char
+
+        return char
+
+UNESCAPE_TABLE = UnescapeTable()
 
 def unescape(string: str):
-    result = re.sub(r'%u([a-fA-F0-9]{4})|%([a-fA-F0-9]{2})', parse, string)
+    if '%' not in string:
+        return string
+
+    result = UNESCAPE_PATTERN.sub(parse, string)
 
     return result
 
 def parse(hex_string: re.Match):
-    hex_4, hex_2 = hex_string.groups()
-    string = hex_4 if hex_4 is not None else hex_2
-    return chr(int(string, 16))
\ No newline at end of file
+    return UNESCAPE_TABLE[hex_string.group()]
\ No newline at end of file
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+from dataclasses import dataclass, replace
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .inner_field import InnerField
+from .defines import InnerOperation
+from .action import ActionEncoder
+from .decoder import extract, get_field_top, iter_raw_pages, parse_quiz_comment, step_quiz, RawPage, Store
+from .encoder import encode_cells, lock_field, FumenEncoder
+from .field import create_new_inner_field
+from .comments import COMMENT_TABLE
+from .js_escape import EscapeTable, ESCAPE_TABLE
+from .quiz import Quiz
+from .constants import FieldConstants, VERSION_INFO
+from .bulk import map_chunks
+
+__all__ = ['MinifyReport', 'minify', 'minify_many', 'verify_minified']
+
+# Characters of the comment table are sent as they are instead of being escaped like js escape() does,
+# other characters are escaped by the shared table
+# '%' is only escaped when the next character could make it the start of an escape sequence
+COMMENT_ESCAPE_TABLE = EscapeTable(ESCAPE_TABLE)
+COMMENT_ESCAPE_TABLE.update((ord(char), char) for char in COMMENT_TABLE if char != '%')
+ESCAPE_STARTS = frozenset('0123456789abcdefABCDEFu')
+
+# What decode() gives for a page, without the refs which only tell where the field and the comment were recorded:
+# (field bytes, operation or None, (lock, mirror, colorize, rise, quiz), comment)
+PageState = Tuple[bytes, Optional[InnerOperation], Tuple[bool, bool, bool, bool, bool], str]
+
+# Shortest escape of a comment that unescape() turns back into the same text
+def escape_comment(text: str) -> str:
+    parts = [part.translate(COMMENT_ESCAPE_TABLE) for part in text.split('%')]
+    return parts[0] + ''.join(('%25' if part[:1] in ESCAPE_STARTS else '%') + part for part in parts[1:])
+
+def iter_page_states(fumen: str) -> Iterator[PageState]:
+    version, data = extract(fumen)
+    for _, field, piece, action, quiz, comment, _, _ in iter_raw_pages(data, get_field_top(version)):
+        yield (field.to_bytes(), piece, (action.lock, action.mirror, action.colorize, action.rise, quiz), comment)
+
+# The minified fumen must decode to the same pages as the original one
+def verify_minified(fumen: str, minified: str) -> bool:
+    try:
+        return list(iter_page_states(fumen)) == list(iter_page_states(minified))
+
+    except Exception:
+        return False
+
+# Data of the fumen itself without '?' line separators, the decoder drops them anyway
+def strip_fumen(fumen: str) -> str:
+    version, data = extract(fumen)
+    return 'v' + version + '@' + data
+
+# Encoder for pages coming from iter_raw_pages(), it follows the comment and quiz state the decoder
+# will have while reading the new fumen
+# A comment is recorded only when the decoder would not carry the same text over from the previous page
+class RawPageEncoder():
+    fumen_encoder: FumenEncoder
+    prev_cells: bytes
+    last_comment: str
+    quiz: Optional[Quiz]
+    page_count: int
+
+    __action_encoder: ActionEncoder
+
+    def __init__(self):
+        self.fumen_encoder = FumenEncoder()
+        self.prev_cells = create_new_inner_field().to_bytes()
+        self.last_comment = ''
+        self.quiz = None
+        self.page_count = 0
+
+        self.__action_encoder = ActionEncoder(FieldConstants.WIDTH, FieldConstants.HEIGHT, FieldConstants.GARBAGE_LINE)
+
+    # keep_comment_page records the comment only when the page recorded it in its own fumen
+    def append(self, raw_page: RawPage, keep_comment_page: bool = False):
+        _, field, _, action, page_quiz, comment, _, _ = raw_page
+        quiz = self.quiz
+
+        self.fumen_encoder.push_field(*encode_cells(self.prev_cells, field.to_bytes()))
+
+        # A quiz can end with a text that looks like the next comment, the comment is then needed to turn the quiz off
+        if keep_comment_page:
+            record_comment = action.comment
+        elif self.page_count == 0:
+            record_comment = comment != '' or page_quiz
+        else:
+            record_comment = comment != (quiz.format().to_string() if quiz is not None else self.last_comment) or page_quiz != (quiz is not None)
+
+        self.fumen_encoder.fumen_buffer.push(self.__action_encoder.encode(replace(action, comment=record_comment)), 3)
+
+        if record_comment:
+            self.fumen_encoder.push_comment(escape_comment(comment))
+            self.last_comment = comment
+            quiz = parse_quiz_comment(comment)
+
+        self.quiz = step_quiz(quiz, action) if quiz is not None else None
+        self.prev_cells = lock_field(field, action).to_bytes()
+        self.page_count += 1
+
+    # Whether the decoder state of the new fumen is the same as the given state of another fumen at the start of a page,
+    # the data of that page can then be copied as it is
+    def is_synced(self, prev_field: InnerField, store: Store) -> bool:
+        return (store.repeat_count <= 0
+                and store.last_comment_text == self.last_comment
+                and (store.quiz.to_string() if store.quiz is not None else None) == (self.quiz.to_string() if self.quiz is not None else None)
+                and prev_field.to_bytes() == self.prev_cells)
+
+    # Data encoded so far, the encoder starts a new buffer afterwards
+    def flush(self) -> str:
+        data = self.fumen_encoder.fumen_buffer.to_string()
+        self.fumen_encoder = FumenEncoder()
+        return data
+
+# Re-encode the pages of the fumen, with the comments on the same pages as in the fumen when keep_comment_pages is set
+def reencode(fumen: str, keep_comment_pages: bool = False) -> str:
+    version, data = extract(fumen)
+
+    encoder = RawPageEncoder()
+    for raw_page in iter_raw_pages(data, get_field_top(version)):
+        encoder.append(raw_page, keep_comment_pages)
+
+    return VERSION_INFO + encoder.flush()
+
+# Shortest fumen found that decodes to the same pages, never longer than the fumen without '?'
+# Re-encodings are only used when verify_minified() accepts them
+def minify(fumen: str) -> str:
+    shortest = strip_fumen(fumen)
+
+    for keep_comment_pages in (False, True):
+        minified = reencode(fumen, keep_comment_pages)
+        if verify_minified(fumen, minified):
+            return minified if len(minified) < len(shortest) else shortest
+
+    return shortest
+
+@dataclass
+class MinifyReport():
+    fumens: int
+    original_size: int
+    minified_size: int
+
+    def saved(self) -> int:
+        return self.original_size - self.minified_size
+
+# Minify many fumens in worker processes, with the number of characters saved over the whole corpus
+def minify_many(fumens: Iterable[str], workers: int = 1, chunksize: Optional[int] = None) -> Tuple[List[str], MinifyReport]:
+    fumens = list(fumens)
+    minified = map_chunks(minify, fumens, workers, chunksize)
+
+    return (minified, MinifyReport(len(fumens), sum(len(fumen) for fumen in fumens), sum(len(fumen) for fumen in minified)))
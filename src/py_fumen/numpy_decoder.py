@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+
+from typing import Iterable, List, Optional, Tuple
+
+from .decoder import decode_with
+from .inner_field import InnerField
+from .constants import FieldConstants
+
+__all__ = ['PagesOptionException', 'decode_fields_numpy']
+
+class PagesOptionException(Exception):
+    pass
+
+# Decode the fields of many fumens into a (N, 24, 10) uint8 array of Piece values
+# Row 0 is the garbage line and row y + 1 is the play field line y, the same coordinates as InnerField
+# The second array has shape (N, 2) and holds (fumen index, page index) for every field
+# numpy is only required when this function is called
+def decode_fields_numpy(fumens: Iterable[str], pages: str = 'last') -> Tuple['numpy.ndarray', 'numpy.ndarray']:
+    import numpy
+
+    if pages not in ('last', 'all'):
+        raise PagesOptionException(f"Unexpected pages option: {pages}")
+
+    chunks: List[bytes] = []
+    indexes: List[Tuple[int, int]] = []
+
+    for fumen_index, fumen in enumerate(fumens):
+        last: Optional[Tuple[int, bytes]] = None
+
+        def on_page(page_index: int, field: InnerField, *_) -> None:
+            nonlocal last
+            if pages == 'all':
+                chunks.append(field.to_bytes())
+                indexes.append((fumen_index, page_index))
+            else:
+                last = (page_index, field.to_bytes())
+
+        decode_with(fumen, on_page)
+
+        if last is not None:
+            chunks.append(last[1])
+            indexes.append((fumen_index, last[0]))
+
+    fields = numpy.frombuffer(bytearray(b''.join(chunks)), dtype=numpy.uint8)
+    fields = fields.reshape(len(chunks), FieldConstants.MAX_HEIGHT, FieldConstants.WIDTH)
+    index_array = numpy.array(indexes, dtype=numpy.int64).reshape(len(indexes), 2)
+
+    return (fields, index_array)
@@ -1,37 +1,93 @@
 # -*- coding: utf-8 -*-
 
-from dataclasses import dataclass
+from __future__ import annotations
 from typing import List, Optional, Tuple
 from math import floor
 from urllib.parse import unquote
 
-from .inner_field import InnerField
+from .inner_field import FieldSnapshot, InnerField
 from .field import Field, Mino, Operation, create_inner_field
 
-@dataclass
+# Bits of Flags.bits
+LOCK = 1
+MIRROR = 2
+COLORIZE = 4
+RISE = 8
+QUIZ = 16
+
+def flag_property(bit: int) -> property:
+    def get_flag(self: Flags) -> bool:
+        return self.bits & bit != 0
+
+    def set_flag(self: Flags, value: Optional[bool]):
+        self.bits = self.bits | bit if value else self.bits & ~bit
+
+    return property(get_flag, set_flag)
+
+# Page flags packed into one int, None is stored as False
 class Flags():
-    lock: Optional[bool] = True
-    mirror: Optional[bool] = False
-    colorize: Optional[bool] = True
-    rise: Optional[bool] = False
-    quiz: Optional[bool] = False
+    __slots__ = ('bits',)
+    bits: int
+
+    def __init__(self, lock: Optional[bool] = True, mirror: Optional[bool] = False, colorize: Optional[bool] = True, rise: Optional[bool] = False, quiz: Optional[bool] = False):
+        self.bits = (LOCK if lock else 0) | (MIRROR if mirror else 0) | (COLORIZE if colorize else 0) | (RISE if rise else 0) | (QUIZ if quiz else 0)
+
+    @staticmethod
+    def from_bits(bits: int) -> Flags:
+        flags = Flags.__new__(Flags)
+        flags.bits = bits
+        return flags
+
+    lock = flag_property(LOCK)
+    mirror = flag_property(MIRROR)
+    colorize = flag_property(COLORIZE)
+    rise = flag_property(RISE)
+    quiz = flag_property(QUIZ)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+
+        return self.bits == other.bits
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Flags(lock={self.lock}, mirror={self.mirror}, colorize={self.colorize}, rise={self.rise}, quiz={self.quiz})"
 
-@dataclass
 class Refs():
-    field: Optional[int] = None
-    comment: Optional[int] = None
+    __slots__ = ('field', 'comment')
+    field: Optional[int]
+    comment: Optional[int]
+
+    def __init__(self, field: Optional[int] = None, comment: Optional[int] = None):
+        self.field = field
+        self.comment = comment
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+
+        return self.field == other.field and self.comment == other.comment
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Refs(field={self.field}, comment={self.comment})"
 
 class Page():
+    __slots__ = ('index', '__field', 'operation', 'comment', 'flags', 'refs')
     index: Optional[int]
     __field: Optional[InnerField]
     operation: Optional[Operation]
     comment: Optional[str]
-    flag: Optional[Flags]
+    flags: Optional[Flags]
     refs: Optional[Refs]
 
-    def __init__(self, index: Optional[int] = None, field: Optional[InnerField] = None, operation: Optional[Operation] = None, comment: Optional[str] = None, flags: Optional[Flags] = None, refs: Optional[Refs] = None):
+    # With copy_field=False the page keeps the given field, which must not be modified afterwards
+    def __init__(self, index: Optional[int] = None, field: Optional[InnerField] = None, operation: Optional[Operation] = None, comment: Optional[str] = None, flags: Optional[Flags] = None, refs: Optional[Refs] = None, copy_field: bool = True):
         self.index = index
-        self.__field = field.copy()
+        self.__field = field.copy() if copy_field else field
         self.operation = operation
         self.comment = comment
         self.flags = flags
@@ -39,8 +95,18 @@ class Page():
 
         return
 
+    # The page field is never modified in place, so the returned Field shares it and copies it on its first change
     def get_field(self) -> Field:
-        return Field(self.__field.copy())
+        return Field(self.__field, shared=True)
+
+    # Read-only view of the page field
+    def get_inner_field(self) -> FieldSnapshot:
+        return self.__field.snapshot()
+
+    # Field of the page without a copy for the encoder and the bulk packer, it may be shared with other pages
+    # and cached decodes so it must never be modified
+    def _borrow_inner_field(self) -> InnerField:
+        return self.__field
 
     def set_field(self, field: Field):
         self.__field = create_inner_field(field)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+
+from .page import Page
+from .inner_field import InnerField
+from .defines import Piece
+from .action import Action, ActionDecoder, ActionEncoder
+from .decoder import extract, get_field_top, iter_raw_pages, to_page
+from .constants import FieldConstants
+
+__all__ = ['PageCorpus', 'PageCorpusException', 'write_page_corpus']
+
+# File layout, little endian:
+#   header   magic, version, page count, offset of the comment section, comment count
+#   records  one fixed size record per page, the global page id is the record number
+#   comments (comment count + 1) offsets into the UTF-8 comment blob, then the blob
+# A record holds the 240 cells of InnerField.to_bytes() packed two per byte (low nibble first),
+# the action word of ActionEncoder.encode() with a field top of 23, the comment id,
+# the sequence (fumen) number, the page index in the sequence, the refs and the quiz flag
+MAGIC = b'PFPC'
+VERSION = 1
+HEADER = Struct('<4sIQQQ')
+RECORD = Struct('<120sIIIIiiB3x')
+OFFSET = Struct('<Q')
+
+PACKED_FIELD_SIZE = FieldConstants.MAX_BLOCKS // 2
+NO_COMMENT = 0xFFFFFFFF
+NO_REF = -1
+QUIZ_FLAG = 1
+
+# Low and high nibble of a packed byte, for bytes.translate
+LOW_NIBBLES = bytes(byte & 0x0F for byte in range(256))
+HIGH_NIBBLES = bytes(byte >> 4 for byte in range(256))
+
+ACTION_ENCODER = ActionEncoder(FieldConstants.WIDTH, FieldConstants.HEIGHT, FieldConstants.GARBAGE_LINE)
+ACTION_DECODER = ActionDecoder(FieldConstants.WIDTH, FieldConstants.HEIGHT, FieldConstants.GARBAGE_LINE)
+
+class PageCorpusException(Exception):
+    pass
+
+# Every cell is below 16, so shifting the odd cells by 4 bits keeps each of them inside its own byte
+def pack_cells(cells: bytes) -> bytes:
+    low = int.from_bytes(cells[0::2], 'little')
+    high = int.from_bytes(cells[1::2], 'little')
+    return (low | high << 4).to_bytes(PACKED_FIELD_SIZE, 'little')
+
+def unpack_cells(packed: bytes) -> bytes:
+    cells = bytearray(FieldConstants.MAX_BLOCKS)
+    cells[0::2] = packed.translate(LOW_NIBBLES)
+    cells[1::2] = packed.translate(HIGH_NIBBLES)
+    return bytes(cells)
+
+# Convert fumens into a page corpus file, every page of every fumen becomes one record
+# Returns the number of pages written
+def write_page_corpus(path: str, fumens: Iterable[str]) -> int:
+    comment_ids: Dict[str, int] = {}
+    page_count = 0
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0, 0))
+
+        for sequence, fumen in enumerate(fumens):
+            version, data = extract(fumen)
+            for page_index, field, piece, action, quiz, comment, field_ref, comment_ref in iter_raw_pages(data, get_field_top(version)):
+                if comment is None:
+                    comment_id = NO_COMMENT
+                else:
+                    comment_id = comment_ids.setdefault(comment, len(comment_ids))
+
+                file.write(RECORD.pack(pack_cells(field.to_bytes()),
+                                       ACTION_ENCODER.encode(action),
+                                       comment_id,
+                                       sequence,
+                                       page_index,
+                                       field_ref if field_ref is not None else NO_REF,
+                                       comment_ref if comment_ref is not None else NO_REF,
+                                       QUIZ_FLAG if quiz else 0))
+                page_count += 1
+
+        comments_offset = file.tell()
+        write_comments(file, comment_ids)
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, page_count, comments_offset, len(comment_ids)))
+
+    return page_count
+
+def write_comments(file: BinaryIO, comment_ids: Dict[str, int]):
+    blobs = [comment.encode('utf-8') for comment in comment_ids]
+
+    offset = 0
+    for blob in blobs:
+        file.write(OFFSET.pack(offset))
+        offset += len(blob)
+    file.write(OFFSET.pack(offset))
+
+    for blob in blobs:
+        file.write(blob)
+
+# Page corpus file opened with mmap, pages are read by their global page id without decoding any fumen
+class PageCorpus():
+    page_count: int
+    comment_count: int
+
+    __file: BinaryIO
+    __map: mmap
+    __view: memoryview
+    __comments_offset: int
+    __blob_offset: int
+
+    def __init__(self, path: str):
+        self.__file = open(path, 'rb')
+        try:
+            self.__map = mmap(self.__file.fileno(), 0, access=ACCESS_READ)
+
+        except ValueError:
+            self.__file.close()
+            raise PageCorpusException('Unexpected page corpus')
+
+        self.__view = memoryview(self.__map)
+
+        if len(self.__view) < HEADER.size:
+            self.close()
+            raise PageCorpusException('Unexpected page corpus')
+
+        magic, version, self.page_count, self.__comments_offset, self.comment_count = HEADER.unpack_from(self.__view, 0)
+        if magic != MAGIC or version != VERSION or self.__comments_offset != HEADER.size + self.page_count * RECORD.size:
+            self.close()
+            raise PageCorpusException('Unexpected page corpus')
+
+        self.__blob_offset = self.__comments_offset + (self.comment_count + 1) * OFFSET.size
+
+    # Views returned by get_packed_field() must be released first
+    def close(self):
+        try:
+            self.__view.release()
+            self.__map.close()
+
+        finally:
+            self.__file.close()
+
+    def __enter__(self) -> PageCorpus:
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def __record_offset(self, page_id: int) -> int:
+        if page_id < 0:
+            page_id += self.page_count
+
+        if not 0 <= page_id < self.page_count:
+            raise IndexError(f'Page id out of range: {page_id}')
+
+        return HEADER.size + page_id * RECORD.size
+
+    # Packed cells of the page, a view into the mapped file without a copy
+    def get_packed_field(self, page_id: int) -> memoryview:
+        offset = self.__record_offset(page_id)
+        return self.__view[offset:offset + PACKED_FIELD_SIZE]
+
+    # Cells in the order of InnerField.to_bytes()
+    def get_cells(self, page_id: int) -> bytes:
+        offset = self.__record_offset(page_id)
+        return unpack_cells(self.__map[offset:offset + PACKED_FIELD_SIZE])
+
+    def get_field(self, page_id: int) -> InnerField:
+        return InnerField.from_bytes(self.get_cells(page_id))
+
+    def get_action(self, page_id: int) -> Action:
+        return ACTION_DECODER.decode(self.__unpack(page_id)[1])
+
+    def get_comment(self, page_id: int) -> Optional[str]:
+        return self.get_comment_by_id(self.__unpack(page_id)[2])
+
+    def get_comment_by_id(self, comment_id: int) -> Optional[str]:
+        if comment_id == NO_COMMENT:
+            return None
+
+        if not 0 <= comment_id < self.comment_count:
+            raise PageCorpusException(f'Unexpected comment id: {comment_id}')
+
+        start, = OFFSET.unpack_from(self.__view, self.__comments_offset + comment_id * OFFSET.size)
+        end, = OFFSET.unpack_from(self.__view, self.__comments_offset + (comment_id + 1) * OFFSET.size)
+        return str(self.__map[self.__blob_offset + start:self.__blob_offset + end], 'utf-8')
+
+    # (sequence number, page index in the sequence) of the page
+    def get_location(self, page_id: int) -> Tuple[int, int]:
+        _, _, _, sequence, page_index, _, _, _ = self.__unpack(page_id)
+        return (sequence, page_index)
+
+    def get_page(self, page_id: int) -> Page:
+        packed, action_value, comment_id, _, page_index, field_ref, comment_ref, flags = self.__unpack(page_id)
+        field = InnerField.from_bytes(unpack_cells(packed))
+        action = ACTION_DECODER.decode(action_value)
+
+        return to_page((page_index,
+                        field,
+                        action.piece if action.piece.piece_type is not Piece.EMPTY else None,
+                        action,
+                        flags & QUIZ_FLAG != 0,
+                        self.get_comment_by_id(comment_id),
+                        field_ref if field_ref != NO_REF else None,
+                        comment_ref if comment_ref != NO_REF else None),
+                       field)
+
+    def __getitem__(self, page_id: int) -> Page:
+        return self.get_page(page_id)
+
+    def __iter__(self) -> Iterator[Page]:
+        return (self.get_page(page_id) for page_id in range(self.page_count))
+
+    def __unpack(self, page_id: int) -> Tuple[bytes, int, int, int, int, int, int, int]:
+        return RECORD.unpack_from(self.__view, self.__record_offset(page_id))
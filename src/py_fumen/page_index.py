@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Iterator, List
+import json
+
+from .page import Page
+from .inner_field import InnerField
+from .decoder import extract, get_field_top, iter_raw_pages, to_page, Checkpoint, Store
+
+__all__ = ['PageIndex', 'PageIndexException', 'build_page_index', 'iter_decode_from', 'seek_page']
+
+class PageIndexException(Exception):
+    pass
+
+# Offsets of every page in the fumen data and a decoder checkpoint every `interval` pages
+@dataclass
+class PageIndex():
+    interval: int
+    offsets: List[int]
+    checkpoints: List[Checkpoint]
+
+    def length(self) -> int:
+        return len(self.offsets)
+
+    def to_json(self) -> str:
+        return json.dumps({
+            'interval': self.interval,
+            'offsets': self.offsets,
+            'checkpoints': [
+                [checkpoint.page_index, checkpoint.offset, checkpoint.field.hex(), checkpoint.repeat_count,
+                 checkpoint.comment_ref, checkpoint.field_ref, checkpoint.last_comment_text, checkpoint.quiz]
+                for checkpoint in self.checkpoints
+            ],
+        })
+
+    @staticmethod
+    def from_json(text: str) -> PageIndex:
+        obj = json.loads(text)
+        checkpoints = [
+            Checkpoint(page_index, offset, bytes.fromhex(field), repeat_count, comment_ref, field_ref, last_comment_text, quiz)
+            for page_index, offset, field, repeat_count, comment_ref, field_ref, last_comment_text, quiz in obj['checkpoints']
+        ]
+        return PageIndex(obj['interval'], obj['offsets'], checkpoints)
+
+def build_page_index(fumen: str, interval: int = 100) -> PageIndex:
+    if interval < 1:
+        raise PageIndexException(f'Unexpected interval: {interval}')
+
+    version, data = extract(fumen)
+    offsets: List[int] = []
+    checkpoints: List[Checkpoint] = []
+
+    def on_page_start(page_index: int, offset: int, prev_field: InnerField, store: Store) -> None:
+        offsets.append(offset)
+        if page_index % interval == 0:
+            checkpoints.append(Checkpoint.create(page_index, offset, prev_field, store))
+
+    for _ in iter_raw_pages(data, get_field_top(version), on_page_start=on_page_start):
+        pass
+
+    return PageIndex(interval, offsets, checkpoints)
+
+# Decode pages from the given page onwards, starting at the nearest checkpoint
+def iter_decode_from(fumen: str, page_index: PageIndex, start: int) -> Iterator[Page]:
+    if not 0 <= start < page_index.length():
+        raise PageIndexException(f'Page out of range: {start}')
+
+    version, data = extract(fumen)
+    checkpoint = page_index.checkpoints[start // page_index.interval]
+    for raw_page in iter_raw_pages(data, get_field_top(version), checkpoint):
+        if start <= raw_page[0]:
+            yield to_page(raw_page)
+
+def seek_page(fumen: str, page_index: PageIndex, index: int) -> Page:
+    return next(iter_decode_from(fumen, page_index, index))
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from typing import Dict, List, Set, Tuple
+
+from .defines import is_mino_piece, InnerOperation, Piece, Rotation
+from .inner_field import InnerField, PieceException
+from .geometry import BOUNDS, CANONICALS
+from .constants import FieldConstants
+
+__all__ = ['get_placements']
+
+SPAWN_X = 4
+SPAWN_Y = 20
+
+CLOCKWISE = {Rotation.SPAWN: Rotation.RIGHT, Rotation.RIGHT: Rotation.REVERSE, Rotation.REVERSE: Rotation.LEFT, Rotation.LEFT: Rotation.SPAWN}
+COUNTER_CLOCKWISE = {after: before for before, after in CLOCKWISE.items()}
+FLIP = {rotation: CLOCKWISE[CLOCKWISE[rotation]] for rotation in Rotation}
+
+# SRS offset tables, kick n from a rotation to another is OFFSETS[from][n] - OFFSETS[to][n]
+JLSTZ_OFFSETS = {
+    Rotation.SPAWN: ((0, 0), (0, 0), (0, 0), (0, 0), (0, 0)),
+    Rotation.RIGHT: ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+    Rotation.REVERSE: ((0, 0), (0, 0), (0, 0), (0, 0), (0, 0)),
+    Rotation.LEFT: ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+}
+
+I_OFFSETS = {
+    Rotation.SPAWN: ((0, 0), (-1, 0), (2, 0), (-1, 0), (2, 0)),
+    Rotation.RIGHT: ((-1, 0), (0, 0), (0, 0), (0, 1), (0, -2)),
+    Rotation.REVERSE: ((-1, 1), (1, 1), (-2, 1), (1, 0), (-2, 0)),
+    Rotation.LEFT: ((0, 1), (0, 1), (0, 1), (0, -1), (0, 2)),
+}
+
+O_OFFSETS = {
+    Rotation.SPAWN: ((0, 0),),
+    Rotation.RIGHT: ((0, -1),),
+    Rotation.REVERSE: ((-1, -1),),
+    Rotation.LEFT: ((-1, 0),),
+}
+
+# 180 kicks in the style of SRS+, relative to a rotation inside the bounding box
+FLIP_KICKS = {
+    Rotation.SPAWN: ((0, 0), (0, 1), (1, 1), (-1, 1), (1, 0), (-1, 0)),
+    Rotation.REVERSE: ((0, 0), (0, -1), (-1, -1), (1, -1), (-1, 0), (1, 0)),
+    Rotation.RIGHT: ((0, 0), (1, 0), (1, 2), (1, 1), (0, 2), (0, 1)),
+    Rotation.LEFT: ((0, 0), (-1, 0), (-1, 2), (-1, 1), (0, 2), (0, 1)),
+}
+
+Kicks = Tuple[Tuple[int, int], ...]
+
+def get_offsets(piece: Piece) -> Dict[Rotation, Kicks]:
+    if piece is Piece.I:
+        return I_OFFSETS
+    if piece is Piece.O:
+        return O_OFFSETS
+
+    return JLSTZ_OFFSETS
+
+def build_kicks(piece: Piece) -> Dict[Tuple[Rotation, Rotation], Kicks]:
+    offsets = get_offsets(piece)
+    kicks: Dict[Tuple[Rotation, Rotation], Kicks] = {}
+    for rotation in Rotation:
+        for after in (CLOCKWISE[rotation], COUNTER_CLOCKWISE[rotation]):
+            kicks[(rotation, after)] = tuple((fx - tx, fy - ty) for (fx, fy), (tx, ty) in zip(offsets[rotation], offsets[after]))
+
+        # The piece definitions rotate around (0, 0), so the 180 kicks are shifted by the first offsets
+        after = FLIP[rotation]
+        base_x = offsets[rotation][0][0] - offsets[after][0][0]
+        base_y = offsets[rotation][0][1] - offsets[after][0][1]
+        kicks[(rotation, after)] = tuple((base_x + dx, base_y + dy) for dx, dy in FLIP_KICKS[rotation])
+
+    return kicks
+
+KICKS = {piece: build_kicks(piece) for piece in Piece if is_mino_piece(piece)}
+
+State = Tuple[Rotation, int, int]
+
+# A kick moves a piece at most 2 rows and a rotation changes its bottom by at most 2 rows
+# so moves from a position FREE_MARGIN rows above the stack never reach the stack
+FREE_MARGIN = 5
+
+# All placements reachable from the spawn position with moves, soft drop and SRS rotations
+# Placements covering the same cells are merged into one canonical operation
+def get_placements(field: InnerField, piece: Piece, use_180: bool = False, spawn_x: int = SPAWN_X, spawn_y: int = SPAWN_Y) -> List[InnerOperation]:
+    if not is_mino_piece(piece):
+        raise PieceException('Unsupported piece')
+
+    kicks = KICKS[piece]
+    canonicals = CANONICALS[piece]
+
+    # Collision results are shared by every path reaching the same position
+    fits: Dict[State, bool] = {}
+
+    def can_fill(rotation: Rotation, x: int, y: int) -> bool:
+        state = (rotation, x, y)
+        result = fits.get(state)
+        if result is None:
+            result = fits[state] = field.can_fill(piece, rotation, x, y)
+        return result
+
+    def rotate(rotation: Rotation, x: int, y: int, after: Rotation):
+        for dx, dy in kicks[(rotation, after)]:
+            if can_fill(after, x + dx, y + dy):
+                return (after, x + dx, y + dy)
+        return None
+
+    start = (Rotation.SPAWN, spawn_x, spawn_y)
+    if not can_fill(*start):
+        return []
+
+    # Every position in the empty rows above the stack is reachable when spawn is high enough above it,
+    # so the search starts from a band of FREE_MARGIN rows on top of the stack instead of from spawn
+    stack_top = max(field.get_heights())
+    bounds = BOUNDS[piece]
+    if stack_top + 2 * FREE_MARGIN <= spawn_y:
+        floor_y = stack_top
+        seeds = [(rotation, x, y)
+                 for rotation in Rotation
+                 for x in range(-bounds[rotation][0], FieldConstants.WIDTH - bounds[rotation][1])
+                 for y in range(stack_top - bounds[rotation][2], stack_top - bounds[rotation][2] + FREE_MARGIN)]
+    else:
+        floor_y = FieldConstants.HEIGHT
+        seeds = [start]
+
+    visited: Set[State] = set(seeds)
+    queue = deque(seeds)
+    placements: Dict[State, InnerOperation] = {}
+
+    while queue:
+        rotation, x, y = queue.popleft()
+
+        if not can_fill(rotation, x, y - 1):
+            canonical, dx, dy = canonicals[rotation]
+            key = (canonical, x + dx, y + dy)
+            if key not in placements:
+                placements[key] = InnerOperation(piece, canonical, x + dx, y + dy)
+
+        candidates = [
+            (rotation, x - 1, y) if can_fill(rotation, x - 1, y) else None,
+            (rotation, x + 1, y) if can_fill(rotation, x + 1, y) else None,
+            (rotation, x, y - 1) if can_fill(rotation, x, y - 1) else None,
+            rotate(rotation, x, y, CLOCKWISE[rotation]),
+            rotate(rotation, x, y, COUNTER_CLOCKWISE[rotation]),
+        ]
+        if use_180:
+            candidates.append(rotate(rotation, x, y, FLIP[rotation]))
+
+        for state in candidates:
+            if state is None or state in visited:
+                continue
+
+            # Positions above the band are free and only lead back into it
+            if floor_y + FREE_MARGIN <= state[2] + bounds[state[0]][2]:
+                continue
+
+            visited.add(state)
+            queue.append(state)
+
+    return [placements[key] for key in sorted(placements, key=lambda state: (state[0], state[2], state[1]))]
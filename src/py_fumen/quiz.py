@@ -3,7 +3,7 @@
 from __future__ import annotations
 from enum import Enum
 from typing import List, Optional
-from re import search
+import re
 
 from .defines import parse_piece, parse_piece_name, Piece
 
@@ -12,8 +12,21 @@ class Operation(Enum):
     SWAP = 'swap'
     STOCK = 'stock'
 
+PIECE_NAMES = 'TIOSZJL'
+
+# #Q=[hold](current) followed by the next pieces and the rest of the comment
+QUIZ_FORMAT = re.compile(r"^#Q=\[([TIOSZJL]?)]\(([TIOSZJL]?)\)(.*)$")
+
+# Quiz state is the hold piece, the current piece and an offset into the text after (current)
+# Operations only move the offset, the text is shared between states and the #Q= string is built when it is read
+# Comments that are not in the #Q=[hold](current) form are kept as they are in __raw
 class Quiz():
-    quiz: str
+    __raw: Optional[str]
+    __hold: str
+    __current: str
+    __least: str
+    __offset: int
+    __text: Optional[str]
 
     @staticmethod
     def trim(quiz: str) -> str:
@@ -29,17 +42,83 @@ class Quiz():
         if len(replaced) == 0 or quiz == '#Q=[]()' or not quiz.startswith('#Q='):
             return quiz
 
-        if not(search("^#Q=\[[TIOSZJL]?]\([TIOSZJL]?\)[TIOSZJL]*;?.*$", replaced)):
+        if not(re.search(r"^#Q=\[[TIOSZJL]?]\([TIOSZJL]?\)[TIOSZJL]*;?.*$", replaced)):
             raise Quiz.PieceException(f"Current piece doesn't exist, however next pieces exist: {quiz}")
 
         return replaced
 
     def __init__(self, quiz: str):
-        self.quiz = self.__verify(quiz)
+        verified = self.__verify(quiz)
+        matched = QUIZ_FORMAT.match(verified) if verified.startswith('#Q=') else None
+
+        if matched is None:
+            self.__raw = verified
+            self.__hold = ''
+            self.__current = ''
+            self.__least = ''
+            self.__offset = 0
+            self.__text = verified
+        else:
+            self.__raw = None
+            self.__hold = matched.group(1)
+            self.__current = matched.group(2)
+            self.__least = matched.group(3)
+            self.__offset = 0
+            self.__text = verified
+
+    # Next state sharing the text of this one, the current piece is checked like __verify would
+    def __of(self, hold: str, current: str, offset: int) -> Quiz:
+        # #Q=[hold]()) reads as an empty current piece followed by the ')'
+        if current == ')':
+            current = ''
+            offset -= 1
+
+        if current != '' and (len(current) != 1 or current not in PIECE_NAMES):
+            raise Quiz.PieceException(f"Current piece doesn't exist, however next pieces exist: #Q=[{hold}]({current}){self.__least[offset:]}")
+
+        quiz = Quiz.__new__(Quiz)
+        quiz.__raw = None
+        quiz.__hold = hold
+        quiz.__current = current
+        quiz.__least = self.__least
+        quiz.__offset = offset
+        quiz.__text = None
+        return quiz
+
+    @property
+    def quiz(self) -> str:
+        return self.to_string()
+
+    # Assigning the text parses it again like Quiz(text)
+    @quiz.setter
+    def quiz(self, quiz: str):
+        self.__init__(quiz)
+
+    def __is_empty(self) -> bool:
+        return self.__hold == '' and self.__current == '' and len(self.__least) <= self.__offset
+
+    def __is_end(self) -> bool:
+        return self.__hold == '' and self.__current == '' and self.__offset < len(self.__least) and self.__least[self.__offset] == ';'
+
+    def __char_at(self, offset: int) -> str:
+        if len(self.__least) <= offset:
+            raise IndexError('string index out of range')
+
+        return self.__least[offset]
+
+    # Offset of least_after_next2()
+    def __after_next(self) -> int:
+        if self.__char_at(self.__offset) == ';':
+            return self.__offset
+
+        return self.__offset + 1
 
     def next(self) -> str:
-        index = self.quiz.find(')') + 1
-        name = self.quiz[index]
+        if self.__raw is None:
+            name = self.__char_at(self.__offset)
+        else:
+            index = self.__raw.find(')') + 1
+            name = self.__raw[index]
 
         if name is None or name == ';':
             return ''
@@ -57,31 +136,43 @@ class Quiz():
         return Quiz(f"#Q=[{first}]({second[0]}){second[1:]}")
 
     def least(self) -> str:
-        index = self.quiz.find(')')
-        return self.quiz[index+1:]
+        if self.__raw is None:
+            return self.__least[self.__offset:]
+
+        index = self.__raw.find(')')
+        return self.__raw[index+1:]
 
     def current(self) -> str:
-        index = self.quiz.find('(') + 1
-        name = self.quiz[index]
+        if self.__raw is None:
+            return self.__current
+
+        index = self.__raw.find('(') + 1
+        name = self.__raw[index]
         if name == ')':
             return ''
 
         return name
 
     def hold(self) -> str:
-        index = self.quiz.find('[') + 1
-        name = self.quiz[index]
+        if self.__raw is None:
+            return self.__hold
+
+        index = self.__raw.find('[') + 1
+        name = self.__raw[index]
         if name == ']':
             return ''
 
         return name
 
     def least_after_next2(self) -> str:
-        index = self.quiz.find(')')
-        if self.quiz[index+1] == ';':
-            return self.quiz[index+1:]
+        if self.__raw is None:
+            return self.__least[self.__after_next():]
+
+        index = self.__raw.find(')')
+        if self.__raw[index+1] == ';':
+            return self.__raw[index+1:]
 
-        return self.quiz[index+2:]
+        return self.__raw[index+2:]
 
     class HoldException(Exception):
         pass
@@ -107,8 +198,9 @@ class Quiz():
         raise self.HoldException(f"Unexpected hold piece in quiz: {self.quiz}")
 
     def least_in_active_bag(self) -> str:
-        separate_index = self.quiz.find(';')
-        quiz = self.quiz[0:separate_index] if 0 <= separate_index else self.quiz
+        quiz = self.quiz
+        separate_index = quiz.find(';')
+        quiz = quiz[0:separate_index] if 0 <= separate_index else quiz
         index = quiz.find(')')
         if quiz[index+1] == ';':
             return quiz[index+1:]
@@ -116,6 +208,13 @@ class Quiz():
         return quiz[index+2:]
 
     def direct(self) -> Quiz:
+        if self.__raw is None:
+            if self.__current == '':
+                offset = self.__after_next()
+                return self.__of(self.__hold, self.__char_at(offset), offset + 1)
+
+            return self.__of(self.__hold, self.next(), self.__after_next())
+
         if self.current() == '':
             least = self.least_after_next2()
             return Quiz(f"#Q=[{self.hold()}]({least[0]}){least[1:]}")
@@ -127,6 +226,9 @@ class Quiz():
             raise self.HoldException(f"Cannot find hold piece: {self.quiz}")
 
         next = self.next()
+        if self.__raw is None:
+            return self.__of(self.__current, next, self.__after_next())
+
         return Quiz(f"#Q=[{self.current()}]({next}){self.least_after_next2()}")
 
     class StockException(Exception):
@@ -136,6 +238,10 @@ class Quiz():
         if self.hold() != '' or self.next() == '':
              raise self.StockException(f"Cannot stock: {self.quiz}")
 
+        if self.__raw is None:
+            offset = self.__after_next()
+            return self.__of(self.__current, self.__char_at(offset), offset + 1)
+
         least = self.least_after_next2()
         head = least[0] if least[0] is not None else ''
 
@@ -158,9 +264,12 @@ class Quiz():
         raise self.OperationException('Unexpected operation')
 
     def can_operate(self) -> bool:
+        if self.__raw is None and not self.__is_end():
+            return not self.__is_empty()
+
         quiz = self.quiz
         if quiz.startswith('#Q=[]();'):
-            quiz = self.quiz[8:]
+            quiz = quiz[8:]
 
         return quiz.startswith('#Q=') and quiz != '#Q=[]()'
 
@@ -185,16 +294,41 @@ class Quiz():
         return [Piece.EMPTY if name is None or name == ' ' or name == ';' else parse_piece_name(name) for name in [*names]]
 
     def to_string(self) -> str:
-        return self.quiz
+        if self.__text is None:
+            self.__text = f"#Q=[{self.__hold}]({self.__current}){self.__least[self.__offset:]}"
+
+        return self.__text
 
     def next_if_end(self) -> Quiz:
-        if self.quiz.startswith('#Q=[]();'):
-            return Quiz(self.quiz[8:])
+        if self.__raw is None:
+            if self.__is_end():
+                return Quiz(self.__least[self.__offset + 1:])
+
+            return self
+
+        if self.__raw.startswith('#Q=[]();'):
+            return Quiz(self.__raw[8:])
 
         return self
 
     def format(self) -> Quiz:
         quiz = self.next_if_end()
+        if quiz.__raw is None:
+            if quiz.__is_empty():
+                return Quiz('')
+
+            if quiz.__current == '' and quiz.__hold != '':
+                return quiz.__of('', quiz.__hold, quiz.__offset)
+
+            if quiz.__current == '':
+                head = quiz.__char_at(quiz.__offset)
+                if head == ';':
+                    return Quiz(quiz.__least[quiz.__offset + 1:])
+
+                return quiz.__of('', head, quiz.__offset + 1)
+
+            return quiz
+
         if quiz.quiz == '#Q=[]()':
             return Quiz('')
 
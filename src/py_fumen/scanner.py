@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import re
+from mmap import mmap, ACCESS_READ
+from typing import Iterable, Iterator, Tuple
+
+__all__ = ['ScannedFumen', 'scan_text', 'scan_chunks', 'scan_stream', 'scan_file', 'iter_fumens']
+
+# (version, data, offset of the prefix in the source)
+# data is normalized like extract(): '?' line separators are removed and escaped URL characters are restored
+ScannedFumen = Tuple[str, str, int]
+
+# One pass for every prefix and version, the data stops at '&', '#', whitespace and any other character outside the fumen alphabet
+# '+', '/' and '?' may be percent-encoded when the fumen is embedded in a URL parameter
+FUMEN_PATTERN = r'[vmd](115|110)@((?:[A-Za-z0-9+/?]+|%2[BbFf]|%3[Ff])+)'
+TEXT_PATTERN = re.compile(FUMEN_PATTERN)
+BYTES_PATTERN = re.compile(FUMEN_PATTERN.encode('ascii'))
+
+URL_ESCAPES = re.compile(r'%(2[BbFf]|3[Ff])')
+
+# A match near the end of a chunk may continue in the next one (possibly after a split escape like '%2'),
+# and the last PREFIX_LENGTH characters may hold a prefix without data yet
+PREFIX_LENGTH = len('v115@')
+ESCAPE_LENGTH = len('%2B')
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+def normalize_data(data: str) -> str:
+    if '%' in data:
+        data = URL_ESCAPES.sub(lambda match: chr(int(match.group(1), 16)), data)
+
+    return data.replace('?', '')
+
+def to_fumen(version: str, data: str) -> str:
+    return 'v' + version + '@' + data
+
+def scan_text(text: str, offset: int = 0) -> Iterator[ScannedFumen]:
+    for match in TEXT_PATTERN.finditer(text):
+        version, data = match.groups()
+        yield (version, normalize_data(data), offset + match.start())
+
+# Scan text arriving in pieces (e.g. lines of a log or reads of a stream), offsets count characters from the first chunk
+def scan_chunks(chunks: Iterable[str]) -> Iterator[ScannedFumen]:
+    pending = ''
+    base = 0
+    for chunk in chunks:
+        text = pending + chunk
+
+        keep = max(len(text) - PREFIX_LENGTH, 0)
+        for match in TEXT_PATTERN.finditer(text):
+            if len(text) - match.end() < ESCAPE_LENGTH:
+                keep = match.start()
+                break
+
+            version, data = match.groups()
+            yield (version, normalize_data(data), base + match.start())
+            keep = max(keep, match.end())
+
+        pending = text[keep:]
+        base += keep
+
+    yield from scan_text(pending, base)
+
+def scan_stream(stream, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[ScannedFumen]:
+    return scan_chunks(iter(lambda: stream.read(chunk_size), ''))
+
+# Scan a file through mmap, offsets are in bytes
+def scan_file(path: str) -> Iterator[ScannedFumen]:
+    with open(path, 'rb') as file:
+        try:
+            mapped = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        except ValueError:
+            # Empty files can not be mapped
+            return
+
+        with mapped:
+            for match in BYTES_PATTERN.finditer(mapped):
+                version, data = match.groups()
+                yield (version.decode('ascii'), normalize_data(data.decode('ascii')), match.start())
+
+# Fumen strings ready for decode(), decode_many() or DecodeCache.decode()
+def iter_fumens(scanned: Iterable[ScannedFumen]) -> Iterator[str]:
+    return (to_fumen(version, data) for version, data, _ in scanned)
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .inner_field import InnerField
+from .decoder import extract, get_field_top, iter_raw_pages, Store
+from .encoder import lock_field
+from .fumen_buffer import decode_to_value, encode_from_value
+from .page_index import build_page_index, PageIndex
+from .minify import RawPageEncoder
+from .constants import VERSION_INFO
+
+__all__ = ['slice_fumen', 'concat_fumens']
+
+# One unchanged field record covers its own page and up to 63 more pages
+MAX_REPEAT_PAGES = 64
+
+# Part of a fumen to copy: (data without '?', version, page index, start, stop)
+FumenPart = Tuple[str, str, PageIndex, int, int]
+
+# Pages start to stop - 1 of the fumen, like fumen pages[start:stop]
+# Only the first pages are re-encoded until the decoder state matches the one of the fumen, the rest of the data is copied
+# The page index of the fumen can be given to avoid building it
+def slice_fumen(fumen: str, start: Optional[int] = None, stop: Optional[int] = None, page_index: Optional[PageIndex] = None) -> str:
+    return join_parts([to_part(fumen, start, stop, page_index)])
+
+# Pages of every fumen one after another
+# Pages at the start of every fumen are re-encoded until the decoder state is the same as in that fumen,
+# and the repeat count of an unchanged field running to the end of a fumen is cut so that it stops at the seam
+def concat_fumens(fumens: Iterable[str], page_indexes: Optional[Sequence[PageIndex]] = None) -> str:
+    fumens = list(fumens)
+    if page_indexes is None:
+        page_indexes = [None] * len(fumens)
+
+    if len(page_indexes) != len(fumens):
+        raise ValueError('One page index is needed for every fumen')
+
+    return join_parts([to_part(fumen, None, None, page_index) for fumen, page_index in zip(fumens, page_indexes)])
+
+def to_part(fumen: str, start: Optional[int], stop: Optional[int], page_index: Optional[PageIndex]) -> FumenPart:
+    version, data = extract(fumen)
+    if page_index is None:
+        page_index = build_page_index(fumen)
+
+    start, stop, _ = slice(start, stop).indices(page_index.length())
+    return (data, version, page_index, start, max(start, stop))
+
+def join_parts(parts: List[FumenPart]) -> str:
+    encoder = RawPageEncoder()
+    chunks: List[str] = []
+
+    for part_index, part in enumerate(parts):
+        synced = append_head(encoder, part)
+        if synced is None:
+            continue
+
+        data, version, page_index, _, stop = part
+        chunks.append(encoder.flush())
+
+        end = page_index.offsets[stop] if stop < page_index.length() else len(data)
+        if part_index == len(parts) - 1:
+            chunks.append(data[page_index.offsets[synced]:end])
+        else:
+            chunks.append(copy_tail(encoder, part, synced, end))
+
+    chunks.append(encoder.flush())
+    return VERSION_INFO + ''.join(chunks)
+
+# Re-encode the pages from start until the decoder state of the new fumen is the same as in the fumen
+# Returns the first page whose data can be copied, or None when every page was re-encoded
+def append_head(encoder: RawPageEncoder, part: FumenPart) -> Optional[int]:
+    data, version, page_index, start, stop = part
+    if stop <= start:
+        return None
+
+    synced: List[int] = []
+    def on_page_start(index: int, offset: int, prev_field: InnerField, store: Store) -> None:
+        # Data of version 110 is read with another field height, it can not be copied
+        if start < index < stop and not synced and version == '115' and encoder.is_synced(prev_field, store):
+            synced.append(index)
+
+    checkpoint = page_index.checkpoints[start // page_index.interval]
+    for raw_page in iter_raw_pages(data, get_field_top(version), checkpoint, on_page_start):
+        if synced or stop <= raw_page[0]:
+            break
+
+        if start <= raw_page[0]:
+            encoder.append(raw_page)
+
+    return synced[0] if synced else None
+
+# Copy the data of pages synced to stop - 1 and take over the decoder state at the end of them
+def copy_tail(encoder: RawPageEncoder, part: FumenPart, synced: int, end: int) -> str:
+    data, version, page_index, _, stop = part
+
+    # Pages reading a field record, the last one may have a repeat count running past stop
+    field_pages: List[int] = []
+    stores: List[Store] = []
+    def on_page_start(index: int, offset: int, prev_field: InnerField, store: Store) -> None:
+        if store.repeat_count <= 0:
+            field_pages.append(index)
+
+        if not stores:
+            stores.append(store)
+
+    first = max(synced, stop - MAX_REPEAT_PAGES)
+    checkpoint = page_index.checkpoints[first // page_index.interval]
+    for index, field, _, action, _, _, _, _ in iter_raw_pages(data, get_field_top(version), checkpoint, on_page_start):
+        if stop - 1 <= index:
+            break
+
+    # The state after the field of page stop - 1 was read, it is the state at the start of page stop
+    store = stores[0]
+    tail = data[page_index.offsets[synced]:end]
+
+    # Cut the repeat count so that the first page of the next part reads its own field
+    if 0 < store.repeat_count:
+        position = page_index.offsets[field_pages[-1]] + 2 - page_index.offsets[synced]
+        tail = tail[:position] + encode_from_value(decode_to_value(tail[position]) - store.repeat_count) + tail[position + 1:]
+
+    encoder.prev_cells = lock_field(field, action).to_bytes()
+    encoder.last_comment = store.last_comment_text
+    encoder.quiz = store.quiz
+    encoder.page_count += stop - synced
+
+    return tail
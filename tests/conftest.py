@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+import sys
+from pathlib import Path
+
+# The package is not installed, tests import it from src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import random
+from typing import List, Optional
+
+from py_fumen import encode, Field, Page, create_inner_field
+from py_fumen.field import Operation
+from py_fumen.page import Flags
+from py_fumen.fumen_buffer import FumenBuffer
+from py_fumen.action import ActionEncoder, Action
+from py_fumen.defines import InnerOperation, Piece, Rotation
+
+PIECE_NAMES = 'ILOZTJS'
+ROTATION_NAMES = ['spawn', 'right', 'reverse', 'left']
+QUIZZES = ['#Q=[](T)IOSZJL', '#Q=[L](T)IOS;ZJ', '#Q=[](J)', '#Q=[S](Z)OIT', '#Q=[]();IOTSZ', '#Q=[T]()IOL']
+TEXTS = ['hello', 'Perfect Clear Opener', '', 'ünïcödé テスト %20', '100% a\tb\nc', 'a' * 300, 'x y z!?&=']
+
+# Page without its own field, the encoder keeps the field of the previous page with its piece locked
+class CarriedPage():
+    field = None
+
+    def __init__(self, operation: Optional[Operation], comment: Optional[str], flags: Flags):
+        self.operation = operation
+        self.comment = comment
+        self.flags = flags
+
+def random_field(rng: random.Random) -> Field:
+    density = rng.choice([0.0, 0.1, 0.3])
+    return Field.create(''.join(rng.choice(PIECE_NAMES + 'X') if rng.random() < density else '_' for _ in range(230)),
+                        ''.join(rng.choice('X_') for _ in range(10)))
+
+def random_comment(rng: random.Random, prev_comment: Optional[str]) -> Optional[str]:
+    value = rng.random()
+    if value < 0.15:
+        return rng.choice(QUIZZES)
+    if value < 0.3:
+        return rng.choice(TEXTS)
+    if value < 0.35:
+        return None
+
+    return prev_comment if prev_comment is not None else ''
+
+# Runs of pages without a field of their own make unchanged field records, some of them longer than one repeat count
+def random_pages(rng: random.Random, page_count: int) -> list:
+    pages = []
+    comment: Optional[str] = None
+    carried = 0
+    for index in range(page_count):
+        operation = Operation(rng.choice(PIECE_NAMES), rng.choice(ROTATION_NAMES), rng.randint(2, 7), rng.randint(2, 20)) if rng.random() < 0.8 else None
+        comment = random_comment(rng, comment)
+
+        if 0 < carried:
+            carried -= 1
+            pages.append(CarriedPage(operation, comment, Flags(lock=rng.random() < 0.5, mirror=rng.random() < 0.05, colorize=rng.random() < 0.9, rise=rng.random() < 0.05)))
+            continue
+
+        if index != 0 and rng.random() < 0.1:
+            carried = rng.choice([3, 20, 70, 140])
+
+        flags = Flags(lock=rng.random() < 0.85, mirror=rng.random() < 0.05, colorize=rng.random() < 0.9, rise=rng.random() < 0.05)
+        if index == 0 or rng.random() < 0.1:
+            pages.append(Page(field=create_inner_field(random_field(rng)), operation=operation, comment=comment, flags=flags))
+        else:
+            pages.append(CarriedPage(operation, comment, flags))
+
+    return pages
+
+def random_fumen(rng: random.Random, page_count: int) -> str:
+    return encode(random_pages(rng, page_count))
+
+# Version 110 fumen with a 21 rows field, every page after the first one repeats the field of the previous page
+def random_fumen_110(rng: random.Random, page_count: int) -> str:
+    fumen_buffer = FumenBuffer()
+    action_encoder = ActionEncoder(10, 21, 1)
+
+    runs: List[List[int]] = []
+    for _ in range(220):
+        cell = rng.choice([0, 0, 0, 1, 2, 3, 8])
+        if runs and runs[-1][0] == cell:
+            runs[-1][1] += 1
+        else:
+            runs.append([cell, 1])
+
+    for cell, length in runs:
+        fumen_buffer.push((cell + 8) * 220 + length - 1, 2)
+
+    for index in range(page_count):
+        if index != 0:
+            fumen_buffer.push(8 * 220 + 219, 2)
+            fumen_buffer.push(0, 1)
+
+        piece = InnerOperation(Piece(rng.randint(1, 7)), Rotation(rng.randint(0, 3)), rng.randint(2, 7), rng.randint(2, 18))
+        fumen_buffer.push(action_encoder.encode(Action(piece, False, False, True, index == 0, True)), 3)
+        if index == 0:
+            fumen_buffer.push(2, 2)
+            fumen_buffer.push(96, 5)
+
+    return 'v110@' + fumen_buffer.to_string()
+
+# Fumens of every size up to a few repeat counts long, plus two of version 110
+def random_corpus(seed: int) -> List[str]:
+    rng = random.Random(seed)
+    corpus = ['v115@vhHJEJWPJyKJz/I1QJUNJvIJAgH']
+    for page_count in [1, 2, 5, 30, 80, 200]:
+        corpus.extend(random_fumen(rng, page_count) for _ in range(2))
+
+    corpus.extend(random_fumen_110(rng, 20) for _ in range(2))
+    return corpus
+
+# Everything decode() gives for a page, for comparing pages decoded in different ways
+def page_state(page) -> tuple:
+    return (page.index, page.get_inner_field(), page.operation, page.comment, page.flags, page.refs)
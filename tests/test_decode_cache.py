@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+from py_fumen import decode, DecodeCache, Field
+from py_fumen.field import Operation
+from py_fumen.decode_cache import CacheEntry
+
+from random_fumens import page_state, random_corpus
+
+CORPUS = random_corpus(19)
+
+def states(pages):
+    return [page_state(page) for page in pages]
+
+def test_cached_pages_are_copy_on_write():
+    fumen = CORPUS[-3]
+    expected = states(decode(fumen))
+    cache = DecodeCache()
+
+    for pages in (cache.decode(fumen), cache.decode(fumen)):
+        assert states(pages) == expected
+
+        for page in pages[::7]:
+            field = page.get_field()
+            field.fill(Operation('T', 'spawn', 4, 21), force=True)
+            field.set(0, 0, 'I')
+            field.clear_line()
+            page.comment = 'changed'
+
+        pages[1].set_field(Field.create('IIII______', None))
+
+    assert states(cache.decode(fumen)) == expected
+    assert cache.stats().hits == 2 and cache.stats().misses == 1
+
+def test_evicts_least_recently_used_by_size():
+    sizes = {fumen: CacheEntry.create(fumen).size for fumen in CORPUS}
+    first, second, third = CORPUS[3], CORPUS[5], CORPUS[7]
+    cache = DecodeCache(max_size=sizes[first] + sizes[second] + sizes[third] - 1)
+
+    cache.decode(first)
+    cache.decode(second)
+    cache.decode(first)
+    cache.decode(third)
+
+    assert first in cache and third in cache and second not in cache
+    assert cache.evictions == 1
+    assert cache.size() == sizes[first] + sizes[third] <= cache.max_size
+
+def test_evicts_by_entry_count_and_skips_entries_larger_than_the_cache():
+    cache = DecodeCache(max_entries=2)
+    for fumen in CORPUS[:5]:
+        cache.decode(fumen)
+
+    assert len(cache) == 2 and cache.evictions == 3
+    assert CORPUS[3] in cache and CORPUS[4] in cache
+
+    small = DecodeCache(max_size=1)
+    assert states(small.decode(CORPUS[-3])) == states(decode(CORPUS[-3]))
+    assert len(small) == 0 and small.size() == 0
+
+def test_invalidate():
+    cache = DecodeCache()
+    for fumen in CORPUS[:3]:
+        cache.decode(fumen)
+
+    assert cache.invalidate(CORPUS[0]) and not cache.invalidate(CORPUS[0])
+    assert len(cache) == 2
+    assert cache.invalidate() and len(cache) == 0 and cache.size() == 0
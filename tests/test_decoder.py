@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import gc
+import random
+import tracemalloc
+
+from py_fumen import create_inner_field, decode, decode_with, encode, Field, Page
+from py_fumen.inner_field import InnerField
+
+from random_fumens import random_corpus, random_fumen
+
+CORPUS = random_corpus(3)
+
+def test_decode_with_same_as_decode():
+    for fumen in CORPUS:
+        decoded = []
+        decode_with(fumen, lambda index, field, operation, action, quiz, comment: decoded.append((index, field.to_bytes(), comment, quiz)))
+
+        assert decoded == [(page.index, page._borrow_inner_field().to_bytes(), page.comment, page.flags.quiz) for page in decode(fumen)]
+
+def test_decode_with_does_not_copy_fields(monkeypatch):
+    fumen = random_fumen(random.Random(500), 500)
+    copy = InnerField.copy
+    copies = []
+
+    def counted_copy(self):
+        copies.append(self)
+        return copy(self)
+
+    monkeypatch.setattr(InnerField, 'copy', counted_copy)
+    pages = []
+    decode_with(fumen, lambda index, *_: pages.append(index))
+
+    assert len(pages) == 500
+    assert copies == []
+
+def walkthrough_fumen(page_count: int, field: Field) -> str:
+    inner_field = create_inner_field(field)
+    return encode([Page(field=inner_field, comment=f'step {index}') for index in range(page_count)])
+
+def test_unchanged_fields_are_shared_with_default_flags():
+    fumen = walkthrough_fumen(300, Field.create('__________' 'XX___XXXXX' 'XXXX_XXXXX', None))
+
+    gc.collect()
+    tracemalloc.start()
+    pages = decode(fumen)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert all(page.flags.lock and page.refs.field == 0 for page in pages[1:])
+    assert len({id(page._borrow_inner_field()) for page in pages}) == 1
+    assert retained < 150 * 1024
+
+def test_full_line_is_cleared_before_sharing():
+    full = create_inner_field(Field.create('XXXXXXXXXX' 'XX___XXXXX', None))
+    cleared = create_inner_field(Field.create('XX___XXXXX', None))
+    pages = decode(encode([Page(field=full), Page(field=cleared), Page(field=cleared)]))
+
+    assert pages[1].refs.field == 0 and pages[2].refs.field == 0
+    assert pages[1].get_field().string() == Field(cleared).string()
+    assert pages[1]._borrow_inner_field() is not pages[0]._borrow_inner_field()
+    assert pages[2]._borrow_inner_field() is pages[1]._borrow_inner_field()
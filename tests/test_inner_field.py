@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from py_fumen import create_inner_field, Field
+from py_fumen.field import Mino
+from py_fumen.inner_field import InnerField
+from py_fumen.defines import InnerOperation, Piece, Rotation
+from py_fumen.constants import FieldConstants
+
+from random_fumens import random_field, PIECE_NAMES, ROTATION_NAMES
+
+MINO_PIECES = [Piece.I, Piece.L, Piece.O, Piece.Z, Piece.T, Piece.J, Piece.S]
+
+# Row masks and column heights computed from the cells alone
+def rescan(field: InnerField):
+    rows = [sum(1 << x for x in range(FieldConstants.WIDTH) if field.get_number_at(x, y) is not Piece.EMPTY) for y in range(FieldConstants.HEIGHT)]
+    heights = [max((y + 1 for y in range(FieldConstants.HEIGHT) if field.get_number_at(x, y) is not Piece.EMPTY), default=0) for x in range(FieldConstants.WIDTH)]
+    return rows, heights
+
+def random_step(rng: random.Random, field: InnerField):
+    step = rng.randrange(9)
+    if step == 0:
+        field.set_number_at(rng.randrange(FieldConstants.WIDTH), rng.randrange(FieldConstants.HEIGHT), Piece(rng.randint(0, 8)))
+    elif step == 1:
+        for x in range(FieldConstants.WIDTH):
+            field.set_number_at(x, rng.randrange(8), Piece.GRAY)
+    elif step == 2:
+        operation = InnerOperation(rng.choice(MINO_PIECES), Rotation(rng.randrange(4)), rng.randint(1, 8), rng.randint(1, 20))
+        if field.can_fill(operation.piece_type, operation.rotation, operation.x, operation.y):
+            field.fill(operation)
+    elif step == 3:
+        field.clear_line()
+    elif step == 4:
+        field.mirror()
+    elif step == 5:
+        field.set_number_at(rng.randrange(FieldConstants.WIDTH), -1, Piece.GRAY)
+        field.rise_garbage()
+    elif step == 6:
+        rng.choice([field.shift_to_left, field.shift_to_right, field.shift_to_up, field.shift_to_bottom])()
+    elif step == 7:
+        field = field.copy()
+
+    return field
+
+@pytest.mark.parametrize('seed', range(4))
+def test_rows_and_heights_match_rescan(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        field = create_inner_field(random_field(rng))
+        for _ in range(30):
+            field = random_step(rng, field)
+            rows, heights = rescan(field)
+
+            assert [field.get_row_at(y) for y in range(FieldConstants.HEIGHT)] == rows
+            assert field.get_heights() == heights
+
+# Drop the piece one row at a time from its position until it can lock
+def naive_put(field: Field, mino: Mino):
+    mino = mino.copy()
+    while 0 <= mino.y:
+        if field.can_lock(mino):
+            field.fill(mino)
+            return mino
+
+        mino.y -= 1
+
+    return None
+
+@pytest.mark.parametrize('seed', range(4))
+def test_put_same_as_naive_drop(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        field = random_field(rng)
+        for _ in range(20):
+            mino = Mino(rng.choice(PIECE_NAMES), rng.choice(ROTATION_NAMES), rng.randint(-1, 10), rng.randint(0, 24))
+            expected_field = field.copy()
+            expected = naive_put(expected_field, mino)
+            try:
+                put = field.put(mino)
+
+            except Field.PutException:
+                put = None
+
+            assert (put.x, put.y) == (expected.x, expected.y) if expected is not None else put is None
+            assert field.string() == expected_field.string()
+            if rng.random() < 0.3:
+                field.clear_line()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from py_fumen import decode, encode, Page
+from py_fumen.field import create_new_inner_field
+from py_fumen.js_escape import escape, unescape
+from py_fumen.minify import escape_comment
+
+TEXTS = ['', 'abc', 'a\nb', 'tab\there', '\x00\x7f\xff', 'Ā x', '%41 %u %', '日本語', 'Perfect Clear Opener']
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_escape_is_zero_padded(text):
+    assert unescape(escape(text)) == text
+
+def test_escape_like_javascript():
+    assert escape('a\nb') == 'a%0Ab'
+    assert escape('Ā') == '%u0100'
+    assert escape('日') == '%u65E5'
+
+# Codes with fewer hex digits than the escape sequence holds, unescape() only reads %XX and %uXXXX
+@pytest.mark.parametrize('char, escaped', [('\x00', '%00'), ('\x01', '%01'), ('\t', '%09'), ('\n', '%0A'), ('\x0f', '%0F'), ('\x10', '%10'),
+                                           ('\u0100', '%u0100'), ('\u0abc', '%u0ABC'), ('\u0fff', '%u0FFF'), ('\u1000', '%u1000')])
+def test_escape_short_codes(char, escaped):
+    assert escape(char) == escaped
+    assert escape_comment(char) == escaped
+    assert unescape(escaped + escaped) == char + char
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_escape_comment(text):
+    escaped = escape_comment(text)
+
+    assert unescape(escaped) == text
+    assert len(escaped) <= len(escape(text))
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_encoded_comment(text):
+    fumen = encode([Page(field=create_new_inner_field(), comment=text), Page(field=create_new_inner_field(), comment=text + '!')])
+
+    assert [page.comment for page in decode(fumen)] == [text, text + '!']
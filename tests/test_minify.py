@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from py_fumen import decode, minify, minify_many, verify_minified
+from py_fumen.minify import iter_page_states, reencode, strip_fumen
+
+from random_fumens import random_corpus
+
+CORPUS = random_corpus(24)
+
+@pytest.mark.parametrize('fumen', CORPUS)
+def test_minify(fumen):
+    minified = minify(fumen)
+
+    assert verify_minified(fumen, minified)
+    assert len(minified) <= len(strip_fumen(fumen))
+    assert [page.comment for page in decode(minified)] == [page.comment for page in decode(fumen)]
+
+@pytest.mark.parametrize('fumen', CORPUS)
+def test_reencode(fumen):
+    assert verify_minified(fumen, reencode(fumen))
+    assert list(iter_page_states(reencode(fumen, keep_comment_pages=True))) == list(iter_page_states(fumen))
+
+def test_verify_minified_rejects_other_pages():
+    fumen = CORPUS[0]
+
+    assert not verify_minified(fumen, CORPUS[1])
+    assert not verify_minified(fumen, fumen[:-3])
+    assert not verify_minified(fumen, 'v115@!')
+
+def test_minify_many():
+    minified, report = minify_many(CORPUS)
+
+    assert minified == [minify(fumen) for fumen in CORPUS]
+    assert report.fumens == len(CORPUS)
+    assert 0 < report.saved()
+    assert report.saved() == sum(len(fumen) for fumen in CORPUS) - sum(len(fumen) for fumen in minified)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from py_fumen import decode, PageCorpus, PageCorpusException, write_page_corpus
+
+from random_fumens import page_state, random_corpus
+
+CORPUS = random_corpus(22)
+
+@pytest.fixture(scope='module')
+def corpus_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('corpus') / 'pages.bin')
+    write_page_corpus(path, CORPUS)
+    return path
+
+def test_pages_equal_decode(corpus_path):
+    expected = [(sequence, page) for sequence, fumen in enumerate(CORPUS) for page in decode(fumen)]
+
+    with PageCorpus(corpus_path) as corpus:
+        assert len(corpus) == len(expected)
+        assert [page_state(page) for page in corpus] == [page_state(page) for _, page in expected]
+
+        for page_id, (sequence, page) in enumerate(expected):
+            assert corpus.get_location(page_id) == (sequence, page.index)
+            assert corpus.get_field(page_id).to_bytes() == page.get_inner_field().cells
+            assert corpus.get_cells(page_id) == page.get_inner_field().cells
+            assert corpus.get_comment(page_id) == page.comment
+
+def test_page_ids(corpus_path):
+    with PageCorpus(corpus_path) as corpus:
+        assert page_state(corpus[-1]) == page_state(decode(CORPUS[-1])[-1])
+        assert page_state(corpus[-len(corpus)]) == page_state(decode(CORPUS[0])[0])
+
+        with pytest.raises(IndexError):
+            corpus.get_page(len(corpus))
+        with pytest.raises(IndexError):
+            corpus.get_location(-len(corpus) - 1)
+
+def test_unexpected_file(tmp_path):
+    for content in [b'', b'PFPC', b'XXXX' + bytes(64)]:
+        path = tmp_path / 'bad.bin'
+        path.write_bytes(content)
+
+        with pytest.raises(PageCorpusException):
+            PageCorpus(str(path))
+
+def test_empty_corpus(tmp_path):
+    path = str(tmp_path / 'empty.bin')
+    assert write_page_corpus(path, []) == 0
+
+    with PageCorpus(path) as corpus:
+        assert len(corpus) == 0 and list(corpus) == []
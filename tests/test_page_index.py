@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from py_fumen import build_page_index, decode, iter_decode_from, seek_page, PageIndex, PageIndexException
+
+from random_fumens import page_state, random_corpus
+
+CORPUS = random_corpus(14)
+
+@pytest.mark.parametrize('fumen', CORPUS)
+def test_seek_page(fumen):
+    rng = random.Random(fumen)
+    states = [page_state(page) for page in decode(fumen)]
+    page_index = build_page_index(fumen, interval=rng.choice([1, 7, 100]))
+
+    assert page_index.length() == len(states)
+    for index in sorted(rng.sample(range(len(states)), min(len(states), 10))):
+        assert page_state(seek_page(fumen, page_index, index)) == states[index]
+
+    start = rng.randrange(len(states))
+    assert [page_state(page) for page in iter_decode_from(fumen, page_index, start)] == states[start:]
+
+@pytest.mark.parametrize('fumen', CORPUS)
+def test_json_round_trip(fumen):
+    page_index = build_page_index(fumen, interval=7)
+    loaded = PageIndex.from_json(page_index.to_json())
+
+    assert loaded == page_index
+    assert [page_state(page) for page in iter_decode_from(fumen, loaded, 0)] == [page_state(page) for page in decode(fumen)]
+
+def test_out_of_range():
+    fumen = CORPUS[0]
+    page_index = build_page_index(fumen)
+
+    with pytest.raises(PageIndexException):
+        seek_page(fumen, page_index, page_index.length())
+    with pytest.raises(PageIndexException):
+        build_page_index(fumen, interval=0)
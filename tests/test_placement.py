@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import random
+from collections import deque
+
+import pytest
+
+from py_fumen import create_inner_field, get_placements, Field
+from py_fumen.placement import CLOCKWISE, COUNTER_CLOCKWISE, FLIP, KICKS, SPAWN_X, SPAWN_Y
+from py_fumen.geometry import CANONICALS
+from py_fumen.inner_field import InnerField
+from py_fumen.defines import Piece, Rotation
+from py_fumen.constants import FieldConstants
+
+MINO_PIECES = [Piece.I, Piece.L, Piece.O, Piece.Z, Piece.T, Piece.J, Piece.S]
+
+# Breadth first search over every position from spawn, without the band above the stack
+def naive_placements(field: InnerField, piece: Piece, use_180: bool):
+    def rotate(rotation, x, y, after):
+        for dx, dy in KICKS[piece][(rotation, after)]:
+            if field.can_fill(piece, after, x + dx, y + dy):
+                return (after, x + dx, y + dy)
+
+        return None
+
+    start = (Rotation.SPAWN, SPAWN_X, SPAWN_Y)
+    if not field.can_fill(piece, *start):
+        return set()
+
+    visited = {start}
+    queue = deque([start])
+    placements = set()
+    while queue:
+        rotation, x, y = queue.popleft()
+        if not field.can_fill(piece, rotation, x, y - 1):
+            canonical, dx, dy = CANONICALS[piece][rotation]
+            placements.add((canonical, x + dx, y + dy))
+
+        moves = [(rotation, x - 1, y), (rotation, x + 1, y), (rotation, x, y - 1)]
+        moves = [move for move in moves if field.can_fill(piece, *move)]
+        moves += [rotate(rotation, x, y, CLOCKWISE[rotation]), rotate(rotation, x, y, COUNTER_CLOCKWISE[rotation])]
+        if use_180:
+            moves.append(rotate(rotation, x, y, FLIP[rotation]))
+
+        for move in moves:
+            if move is not None and move not in visited:
+                visited.add(move)
+                queue.append(move)
+
+    return placements
+
+def random_stack(rng: random.Random) -> InnerField:
+    field = InnerField()
+    density = rng.choice([0.5, 0.8, 0.9])
+    for y in range(rng.randint(0, 14)):
+        for x in range(FieldConstants.WIDTH):
+            if rng.random() < density:
+                field.set_number_at(x, y, Piece.GRAY)
+
+    field.clear_line()
+    return field
+
+def test_fixed_fields():
+    fields = [InnerField(), create_inner_field(Field.create('XX________' 'X___XXXXXX' 'XX_XXXXXXX', None))]
+    for field in fields:
+        for piece in MINO_PIECES:
+            for use_180 in (False, True):
+                placements = get_placements(field, piece, use_180)
+
+                assert len(placements) == len({(operation.rotation, operation.x, operation.y) for operation in placements})
+                assert {(operation.rotation, operation.x, operation.y) for operation in placements} == naive_placements(field, piece, use_180)
+
+@pytest.mark.parametrize('seed', range(3))
+def test_same_as_naive_search(seed):
+    rng = random.Random(seed)
+    for _ in range(15):
+        field = random_stack(rng)
+        for piece in MINO_PIECES:
+            for use_180 in (False, True):
+                placements = get_placements(field, piece, use_180)
+
+                assert all(operation.piece_type is piece for operation in placements)
+                assert {(operation.rotation, operation.x, operation.y) for operation in placements} == naive_placements(field, piece, use_180)
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import random
+import re
+from typing import Optional
+
+import pytest
+
+from py_fumen.quiz import Operation, Quiz
+from py_fumen.defines import parse_piece, parse_piece_name, Piece
+
+# The string based Quiz the state machine replaced, every operation rebuilds the #Q= text
+class StringQuiz():
+    quiz: str
+
+    class PieceException(Exception):
+        pass
+
+    class HoldException(Exception):
+        pass
+
+    class StockException(Exception):
+        pass
+
+    @staticmethod
+    def __verify(quiz: str) -> str:
+        replaced = quiz.strip()
+
+        if len(replaced) == 0 or quiz == '#Q=[]()' or not quiz.startswith('#Q='):
+            return quiz
+
+        if not(re.search(r"^#Q=\[[TIOSZJL]?]\([TIOSZJL]?\)[TIOSZJL]*;?.*$", replaced)):
+            raise StringQuiz.PieceException(f"Current piece doesn't exist, however next pieces exist: {quiz}")
+
+        return replaced
+
+    def __init__(self, quiz: str):
+        self.quiz = self.__verify(quiz)
+
+    def next(self) -> str:
+        index = self.quiz.find(')') + 1
+        name = self.quiz[index]
+
+        if name is None or name == ';':
+            return ''
+
+        return name
+
+    def least(self) -> str:
+        index = self.quiz.find(')')
+        return self.quiz[index+1:]
+
+    def current(self) -> str:
+        index = self.quiz.find('(') + 1
+        name = self.quiz[index]
+        if name == ')':
+            return ''
+
+        return name
+
+    def hold(self) -> str:
+        index = self.quiz.find('[') + 1
+        name = self.quiz[index]
+        if name == ']':
+            return ''
+
+        return name
+
+    def least_after_next2(self) -> str:
+        index = self.quiz.find(')')
+        if self.quiz[index+1] == ';':
+            return self.quiz[index+1:]
+
+        return self.quiz[index+2:]
+
+    def get_operation(self, used: Piece) -> Operation:
+        used_name = parse_piece_name(used)
+        current = self.current()
+        if used_name == current:
+            return Operation.DIRECT
+
+        hold = self.hold()
+        if used_name == hold:
+            return Operation.SWAP
+
+        if hold == '':
+            if used_name == self.next():
+                return Operation.STOCK
+
+        else:
+            if current == '' and used_name == self.next():
+                return Operation.DIRECT
+
+        raise self.HoldException(f"Unexpected hold piece in quiz: {self.quiz}")
+
+    def least_in_active_bag(self) -> str:
+        separate_index = self.quiz.find(';')
+        quiz = self.quiz[0:separate_index] if 0 <= separate_index else self.quiz
+        index = quiz.find(')')
+        if quiz[index+1] == ';':
+            return quiz[index+1:]
+
+        return quiz[index+2:]
+
+    def direct(self) -> StringQuiz:
+        if self.current() == '':
+            least = self.least_after_next2()
+            return StringQuiz(f"#Q=[{self.hold()}]({least[0]}){least[1:]}")
+
+        return StringQuiz(f"#Q=[{self.hold()}]({self.next()}){self.least_after_next2()}")
+
+    def swap(self) -> StringQuiz:
+        if self.hold() == '':
+            raise self.HoldException(f"Cannot find hold piece: {self.quiz}")
+
+        next = self.next()
+        return StringQuiz(f"#Q=[{self.current()}]({next}){self.least_after_next2()}")
+
+    def stock(self) -> StringQuiz:
+        if self.hold() != '' or self.next() == '':
+            raise self.StockException(f"Cannot stock: {self.quiz}")
+
+        least = self.least_after_next2()
+        head = least[0] if least[0] is not None else ''
+
+        if 1 < len(least):
+            return StringQuiz(f"#Q=[{self.current()}]({head}){least[1:]}")
+
+        return StringQuiz(f"#Q=[{self.current()}]({head})")
+
+    def operate(self, operation: Operation) -> StringQuiz:
+        if operation is Operation.DIRECT:
+            return self.direct()
+        if operation is Operation.SWAP:
+            return self.swap()
+
+        return self.stock()
+
+    def can_operate(self) -> bool:
+        quiz = self.quiz
+        if quiz.startswith('#Q=[]();'):
+            quiz = self.quiz[8:]
+
+        return quiz.startswith('#Q=') and quiz != '#Q=[]()'
+
+    def get_hold_piece(self) -> Piece:
+        if not self.can_operate():
+            return Piece.EMPTY
+
+        name = self.hold()
+        if name is None or name == '' or name == ';':
+            return Piece.EMPTY
+
+        return parse_piece(name)
+
+    def get_next_pieces(self, maximum: Optional[int] = None):
+        if not self.can_operate():
+            return [Piece.EMPTY] * maximum if maximum is not None else []
+
+        names = (self.current() + self.next() + self.least_in_active_bag())[0:maximum]
+        if maximum is not None and len(names) < maximum:
+            names += ' ' * (maximum - len(names))
+
+        return [Piece.EMPTY if name is None or name == ' ' or name == ';' else parse_piece_name(name) for name in [*names]]
+
+    def to_string(self) -> str:
+        return self.quiz
+
+    def next_if_end(self) -> StringQuiz:
+        if self.quiz.startswith('#Q=[]();'):
+            return StringQuiz(self.quiz[8:])
+
+        return self
+
+    def format(self) -> StringQuiz:
+        quiz = self.next_if_end()
+        if quiz.quiz == '#Q=[]()':
+            return StringQuiz('')
+
+        current = quiz.current()
+        hold = quiz.hold()
+
+        if current == '' and hold != '':
+            return StringQuiz(f"#Q=[]({hold}){quiz.least()}")
+
+        if current == '':
+            least = quiz.least()
+            head = least[0]
+            if head is None:
+                return StringQuiz('')
+
+            if head == ';':
+                return StringQuiz(least[1:])
+
+            return StringQuiz(f"#Q=[]({head}){least[1:]}")
+
+        return quiz
+
+PIECE_NAMES = 'TIOSZJL'
+READERS = ['to_string', 'can_operate', 'next', 'least', 'current', 'hold', 'least_after_next2', 'least_in_active_bag', 'get_hold_piece', 'get_next_pieces']
+
+def random_text(rng: random.Random) -> str:
+    def pieces(length: int) -> str:
+        return ''.join(rng.choice(PIECE_NAMES + ';; ()[]#Qx\n' if rng.random() < 0.2 else PIECE_NAMES + ';') for _ in range(length))
+
+    if rng.random() < 0.3:
+        return rng.choice(['', ' ', 'hello', 'x()y', 'a(b)', '#Q=[]()', '#Q=', '#Q=[T](', 'T']) + pieces(rng.randint(0, 3))
+
+    text = f"#Q=[{rng.choice(['', rng.choice(PIECE_NAMES)])}]({rng.choice(['', '', rng.choice(PIECE_NAMES)])}){pieces(rng.randint(0, 8))}"
+    if rng.random() < 0.3:
+        text += ';' + rng.choice(['', 'hello', '#Q=[](T)IO', '#Q=[]()', '#Q=[]();x', ' ', 'a(b)', 'x()y'])
+    if rng.random() < 0.1:
+        text = ' ' + text
+    if rng.random() < 0.1:
+        text += ' '
+
+    return text
+
+def outcome(call):
+    try:
+        result = call()
+
+    except Exception as e:
+        return ('error', type(e).__name__)
+
+    return ('ok', result.to_string() if hasattr(result, 'to_string') else result)
+
+# Everything observable on the quiz after each step, steps are what the decoder does with a page or a raw operation
+def trace(quiz_class, text: str, steps) -> list:
+    try:
+        quiz = quiz_class(text)
+
+    except Exception as e:
+        return [('create', type(e).__name__)]
+
+    observed = []
+    for step in steps:
+        observed.extend((name, outcome(lambda: getattr(quiz, name)())) for name in READERS)
+        observed.append(('quiz', outcome(lambda: quiz.quiz)))
+        observed.append(('format', outcome(quiz.format)))
+        observed.append(('next_if_end', outcome(quiz.next_if_end)))
+
+        try:
+            if step == 'format':
+                quiz = quiz.format()
+            elif isinstance(step, str):
+                quiz = getattr(quiz, step)()
+            else:
+                quiz = quiz.next_if_end()
+                quiz = quiz.operate(quiz.get_operation(step))
+
+            observed.append(('step', quiz.to_string()))
+
+        except Exception as e:
+            observed.append(('step error', type(e).__name__))
+            try:
+                quiz = quiz.format()
+                observed.append(('format', quiz.to_string()))
+
+            except Exception as e:
+                observed.append(('format error', type(e).__name__))
+                break
+
+    return observed
+
+@pytest.mark.parametrize('seed', range(4))
+def test_same_as_string_quiz(seed):
+    rng = random.Random(seed)
+    for _ in range(2000):
+        text = random_text(rng)
+        steps = [rng.choice(['format', 'direct', 'swap', 'stock'] + [Piece(rng.randint(0, 8))] * 3) for _ in range(rng.randint(1, 8))]
+
+        assert trace(Quiz, text, steps) == trace(StringQuiz, text, steps), (text, steps)
+
+def test_quiz_is_assignable():
+    quiz = Quiz('#Q=[](T)IO')
+    quiz.quiz = '#Q=[S](Z)L'
+
+    assert quiz.hold() == 'S'
+    assert quiz.direct().to_string() == '#Q=[S](L)'
+
+    quiz.quiz = 'comment'
+    assert quiz.to_string() == 'comment'
+    assert not quiz.can_operate()
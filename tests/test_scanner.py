@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+import io
+import random
+
+from py_fumen import decode, scan_text, scan_chunks, scan_stream, scan_file, iter_fumens
+
+from random_fumens import page_state, random_corpus
+
+CORPUS = random_corpus(23)
+URL_QUOTES = {'+': '%2B', '/': '%2F', '?': '%3F'}
+
+# Text mixing plain fumens, fumens in URL parameters with '+', '/' and '?' percent-encoded,
+# fumens split by '?' line separators, and text around them that is not part of any fumen
+def random_text(rng: random.Random) -> str:
+    parts = []
+    for fumen in CORPUS:
+        prefix, data = fumen.split('@')
+        style = rng.random()
+        if style < 0.3:
+            data = ''.join(URL_QUOTES.get(char, char) if rng.random() < 0.7 else char for char in data)
+            parts.append(f'https://fumen.zui.jp/?{prefix}@{data}&x=1')
+        elif style < 0.5:
+            parts.append(prefix + '@' + '?'.join(data[i:i + 47] for i in range(0, len(data), 47)))
+        else:
+            parts.append(fumen)
+
+        parts.append(rng.choice([' ', '\n', ' see: ', '#', ' v114@abc ', ' 100% ', ' m115 ', ' d110@ ']))
+
+    return ''.join(parts)
+
+def chunked(text: str, sizes) -> list:
+    chunks = []
+    start = 0
+    for size in sizes:
+        if len(text) <= start:
+            break
+        chunks.append(text[start:start + size])
+        start += size
+    return chunks
+
+def test_finds_every_fumen():
+    text = random_text(random.Random(0))
+    scanned = list(iter_fumens(scan_text(text)))
+
+    assert [[page_state(page) for page in decode(fumen)] for fumen in scanned] \
+        == [[page_state(page) for page in decode(fumen)] for fumen in CORPUS]
+
+def test_chunks_equal_text():
+    rng = random.Random(1)
+    for _ in range(5):
+        text = random_text(rng)
+        expected = list(scan_text(text))
+
+        for sizes in ([1] * len(text), [3] * len(text), [7] * len(text), [rng.randint(1, 200) for _ in range(len(text))]):
+            assert list(scan_chunks(chunked(text, sizes))) == expected
+
+        assert list(scan_stream(io.StringIO(text), 5)) == expected
+
+def test_file_offsets_are_bytes(tmp_path):
+    text = 'ünïcödé ' + random_text(random.Random(2))
+    path = tmp_path / 'log.txt'
+    path.write_text(text, encoding='utf-8')
+
+    scanned = list(scan_file(str(path)))
+    assert [(version, data) for version, data, _ in scanned] == [(version, data) for version, data, _ in scan_text(text)]
+
+    content = path.read_bytes()
+    assert all(content[offset + 1:offset + 5] == f'{version}@'.encode('ascii') for version, _, offset in scanned)
+
+def test_empty_input(tmp_path):
+    path = tmp_path / 'empty.txt'
+    path.write_bytes(b'')
+
+    assert list(scan_file(str(path))) == []
+    assert list(scan_chunks([])) == []
+    assert list(scan_chunks(['', 'v115', '@'])) == []
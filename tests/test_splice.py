@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+import pytest
+
+from py_fumen import build_page_index, concat_fumens, decode, slice_fumen
+from py_fumen.minify import iter_page_states
+
+from random_fumens import random_corpus
+
+CORPUS = random_corpus(25)
+STATES = {fumen: list(iter_page_states(fumen)) for fumen in CORPUS}
+
+@pytest.mark.parametrize('fumen', CORPUS)
+def test_slice_fumen(fumen):
+    rng = random.Random(fumen)
+    states = STATES[fumen]
+    page_index = build_page_index(fumen, interval=rng.choice([1, 7, 100]))
+
+    ranges = [(None, None), (0, 1), (-3, None), (None, -1)] + [(rng.randint(0, len(states)), rng.randint(0, len(states) + 2)) for _ in range(30)]
+    for start, stop in ranges:
+        sliced = slice_fumen(fumen, start, stop, page_index)
+
+        assert list(iter_page_states(sliced)) == states[start:stop], (start, stop)
+        assert slice_fumen(fumen, start, stop) == sliced
+
+def test_slice_fumen_comments():
+    fumen = CORPUS[-3]
+    pages = decode(fumen)
+    for start in range(len(pages)):
+        assert [page.comment for page in decode(slice_fumen(fumen, start, start + 70))] == [page.comment for page in pages[start:start + 70]]
+
+@pytest.mark.parametrize('seed', range(8))
+def test_concat_fumens(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        fumens = rng.sample(CORPUS, rng.randint(1, 5))
+        concatenated = concat_fumens(fumens)
+
+        assert list(iter_page_states(concatenated)) == [state for fumen in fumens for state in STATES[fumen]]
+        assert concat_fumens(fumens, [build_page_index(fumen) for fumen in fumens]) == concatenated
+
+def test_concat_sliced_parts():
+    fumen = CORPUS[-3]
+    states = STATES[fumen]
+    for cut in range(0, len(states) + 1, 7):
+        assert list(iter_page_states(concat_fumens([slice_fumen(fumen, None, cut), slice_fumen(fumen, cut)]))) == states
+
+def test_concat_fumens_needs_one_index_per_fumen():
+    with pytest.raises(ValueError):
+        concat_fumens(CORPUS[:2], [build_page_index(CORPUS[0])])